@@ -0,0 +1,165 @@
+"""Сколько байт картинок скачивает браузер ради одной страницы ленты.
+
+Заполняет временную базу постами с фотографиями, нарезает миниатюры
+и варианты очередью posts.thumbnails и разбирает HTML главной страницы.
+Для каждого поста считается, что скачает браузер с экраном заданной
+ширины: исходник, десктопную миниатюру или вариант, выбранный по
+<picture>/srcset.
+
+    python benchmarks/image_bytes.py --posts 10 --viewport 375 --dpr 2
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+
+import django
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+class PictureParser(HTMLParser):
+    """Собирает <picture>: [(исходники [(type, srcset)], src), ...]."""
+
+    def __init__(self, media_url):
+        super().__init__()
+        self.media_url = media_url
+        self.pictures = []
+        self.sources = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'picture':
+            self.sources = []
+        elif tag == 'source' and self.sources is not None:
+            self.sources.append((attrs['type'], attrs['srcset']))
+        elif tag == 'img':
+            if attrs['src'].startswith(self.media_url):
+                self.pictures.append((self.sources or [], attrs['src']))
+            self.sources = None
+
+
+def pick(sources, fallback, width, accepted):
+    """URL, который выберет браузер: первый понятный формат, из его
+    srcset - самый узкий вариант не уже экрана."""
+    for mime, srcset in sources:
+        if mime not in accepted:
+            continue
+        candidates = sorted(
+            (int(descriptor[:-1]), url)
+            for url, descriptor in (
+                candidate.split() for candidate in srcset.split(', ')
+            )
+        )
+        for candidate_width, url in candidates:
+            if candidate_width >= width:
+                return url
+        return candidates[-1][1]
+    return fallback
+
+
+def photo(width=1920, height=1280):
+    """JPEG-фотография: градиент с шумом сжимается как настоящий снимок."""
+    from PIL import Image, ImageFilter
+
+    image = Image.radial_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.effect_noise((width, height), random.randint(20, 60))
+    image = Image.blend(image, noise.convert('RGB'), 0.35)
+    image = image.filter(ImageFilter.GaussianBlur(1))
+    path = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False).name
+    image.save(path, 'JPEG', quality=90)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--viewport', type=int, default=375)
+    parser.add_argument('--dpr', type=float, default=2)
+    args = parser.parse_args()
+
+    django.setup()
+    from django.conf import settings
+    from django.core.files import File
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment
+
+    from posts import thumbnails
+    from posts.models import Post, User
+
+    setup_test_environment()
+    database_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    media_root = tempfile.mkdtemp()
+    with override_settings(MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0):
+        author = User.objects.create_user(username='benchmark')
+        for i in range(args.posts):
+            path = photo()
+            with open(path, 'rb') as image:
+                Post.objects.create(
+                    author=author,
+                    text=f'Пост {i}',
+                    image=File(image, name=f'photo_{i}.jpg')
+                )
+            os.remove(path)
+
+        started = time.perf_counter()
+        thumbnails.run_pending()
+        prepared = time.perf_counter() - started
+
+        client = Client()
+        started = time.perf_counter()
+        html = client.get('/').content.decode()
+        rendered = time.perf_counter() - started
+
+        picture_parser = PictureParser(settings.MEDIA_URL)
+        picture_parser.feed(html)
+
+        def size(url):
+            return os.path.getsize(os.path.join(
+                media_root,
+                url[len(settings.MEDIA_URL):]
+            ))
+
+        width = round(args.viewport * args.dpr)
+        accepted = {
+            mime
+            for sources, src in picture_parser.pictures
+            for mime, srcset in sources
+        }
+        rows = {
+            'исходные картинки': sum(
+                post.image.size for post in Post.objects.all()
+            ),
+            'миниатюра 960px': sum(
+                size(src) for sources, src in picture_parser.pictures
+            ),
+            f'srcset, экран {width}px': sum(
+                size(pick(sources, src, width, accepted))
+                for sources, src in picture_parser.pictures
+            ),
+        }
+    connection.creation.destroy_test_db(database_name, verbosity=0)
+    shutil.rmtree(media_root, ignore_errors=True)
+
+    print(
+        f'Постов на странице: {len(picture_parser.pictures)}, '
+        f'форматы: {", ".join(sorted(accepted))}'
+    )
+    print(f'Нарезка миниатюр и вариантов: {prepared:.2f} c')
+    print(f'Рендер главной страницы: {rendered * 1000:.1f} мс')
+    for name, total in rows.items():
+        print(f'{name:>24}: {total / 1024:8.1f} КиБ')
+
+
+if __name__ == '__main__':
+    main()
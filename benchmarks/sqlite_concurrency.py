@@ -0,0 +1,154 @@
+"""Чтение лент параллельно с записью постов: с профилем PRAGMA и без.
+
+Для каждого профиля создается свежая файловая база (journal_mode
+сохраняется в самом файле), в нее пишут писатели - посты через ORM со
+всеми сигналами, - а читатели в это время выбирают первую страницу
+главной. Печатается число операций в секунду, задержки и сколько раз
+соединение упало с "database is locked".
+
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 2
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+PROFILES = ('default', 'tuned')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(profile, readers, writers, seconds, seed):
+    """Один прогон в отдельном процессе: свои настройки и своя база."""
+    sys.path.insert(0, str(ROOT / 'yatube'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    directory = tempfile.mkdtemp()
+
+    from django.conf import settings
+    import django
+
+    settings.DATABASES['default']['NAME'] = os.path.join(
+        directory,
+        'db.sqlite3'
+    )
+    settings.SQLITE_PRAGMAS = (
+        settings.SQLITE_PRAGMAS if profile == 'tuned' else {}
+    )
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection, OperationalError, transaction
+
+    from posts.consts import MAX_POSTS_DISPLAYED
+    from posts.models import Post, User
+
+    call_command('migrate', verbosity=0)
+    author = User.objects.create_user(username='benchmark')
+    Post.objects.bulk_create(
+        Post(author=author, text=f'Пост {i}') for i in range(seed)
+    )
+    connection.close()
+
+    stop = threading.Event()
+    results = {'read': [], 'write': [], 'locked': 0}
+    lock = threading.Lock()
+
+    def worker(kind):
+        timings = []
+        locked = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                if kind == 'read':
+                    list(Post.objects.for_feed()[:MAX_POSTS_DISPLAYED])
+                else:
+                    with transaction.atomic():
+                        Post.objects.create(author=author, text='Новый пост')
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                locked += 1
+                continue
+            timings.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            results[kind].extend(timings)
+            results['locked'] += locked
+
+    threads = [
+        threading.Thread(target=worker, args=('read',))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=worker, args=('write',))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    shutil.rmtree(directory, ignore_errors=True)
+
+    print(json.dumps({
+        kind: dict(
+            ops=len(results[kind]) / seconds,
+            p50=percentile(results[kind], 0.5) * 1000,
+            p99=percentile(results[kind], 0.99) * 1000,
+        )
+        for kind in ('read', 'write')
+    } | {'locked': results['locked']}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=5000)
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run(args.profile, args.readers, args.writers, args.seconds, args.seed)
+        return
+
+    print(
+        f'Читателей: {args.readers}, писателей: {args.writers}, '
+        f'{args.seconds:g} c на профиль'
+    )
+    print(
+        f'{"профиль":>8} {"чтений/с":>9} {"p50 мс":>7} {"p99 мс":>7} '
+        f'{"записей/с":>10} {"p50 мс":>7} {"p99 мс":>7} {"locked":>7}'
+    )
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--profile', profile, *sys.argv[1:]],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        read, write = result['read'], result['write']
+        print(
+            f'{profile:>8} {read["ops"]:9.0f} {read["p50"]:7.1f} '
+            f'{read["p99"]:7.1f} {write["ops"]:10.0f} {write["p50"]:7.1f} '
+            f'{write["p99"]:7.1f} {result["locked"]:7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,417 @@
+"""Нагрузка на публичные представления через WSGI-приложение.
+
+Заполняет временную базу правдоподобными данными (Faker и mixer):
+пользователи, группы, посты с картинками, комментарии и подписки.
+Затем в том же процессе вызывает WSGI-приложение для index,
+group_list, profile, post_detail, follow_index, post_create,
+add_comment и JSON API (/api/v1/) и печатает JSON: ответов в
+секунду, p50/p95/p99 и число SQL-запросов на ответ. Сид фиксирует
+и данные, и порядок запросов, поэтому прогоны можно сравнивать между собой:
+
+    python benchmarks/views.py > before.json
+    python benchmarks/views.py --baseline before.json > after.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+
+ROOT = Path(__file__).resolve().parent.parent
+IMAGE_COLORS = 20
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def picture(color):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (1280, 853), color).save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def setup(directory):
+    sys.path.insert(0, str(ROOT / 'yatube'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+    from django.conf import settings
+    import django
+
+    settings.DATABASES['default']['NAME'] = os.path.join(
+        directory,
+        'db.sqlite3'
+    )
+    settings.MEDIA_ROOT = os.path.join(directory, 'media')
+    for alias in ('sessions', 'feed_versions'):
+        settings.CACHES[alias]['LOCATION'] = os.path.join(directory, alias)
+    settings.ALLOWED_HOSTS = ['*']
+    settings.THUMBNAIL_WORKERS = 0
+    django.setup()
+
+
+def seed(args, rng):
+    """Наполняет базу, возвращает то, по чему ходят запросы."""
+    from django.core.files.base import ContentFile
+    from faker import Faker
+    from mixer.backend.django import mixer
+
+    from posts import thumbnails
+    from posts.models import Comment, Follow, Group, Post, User
+
+    fake = Faker('ru_RU')
+    fake.seed_instance(args.seed)
+    users = mixer.cycle(args.users).blend(
+        User,
+        username=(f'user{i}' for i in range(args.users)),
+        first_name=(fake.first_name() for _ in range(args.users)),
+        last_name=(fake.last_name() for _ in range(args.users)),
+    )
+    groups = mixer.cycle(args.groups).blend(
+        Group,
+        title=(fake.catch_phrase() for _ in range(args.groups)),
+        slug=(f'group-{i}' for i in range(args.groups)),
+        description=(fake.paragraph() for _ in range(args.groups)),
+    )
+    # Подписки до постов: ленты follow_index заполняются при публикации
+    for user in users:
+        for author in rng.sample(users, min(args.follows, len(users))):
+            if author != user:
+                mixer.blend(Follow, user=user, author=author)
+    images = [
+        picture((rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        for _ in range(IMAGE_COLORS)
+    ]
+    posts = []
+    for i in range(args.posts):
+        post = mixer.blend(
+            Post,
+            author=rng.choice(users),
+            group=rng.choice(groups + [None]),
+            text=fake.text(max_nb_chars=rng.choice((80, 400, 1500))),
+            # Иначе mixer заполнит их мусором, их пишет очередь миниатюр
+            image='',
+            thumbnail='',
+            image_variants='',
+        )
+        if rng.random() < args.images:
+            post.image = ContentFile(
+                rng.choice(images),
+                name=f'photo_{i}.jpg'
+            )
+            post.save()
+        posts.append(post)
+    mixer.cycle(args.comments).blend(
+        Comment,
+        post=(rng.choice(posts) for _ in range(args.comments)),
+        author=(rng.choice(users) for _ in range(args.comments)),
+        text=(fake.sentence() for _ in range(args.comments)),
+    )
+    thumbnails.run_pending()
+    return users, groups, posts, fake
+
+
+class Browser:
+    """Запросы к WSGI-приложению с cookie одного пользователя."""
+
+    def __init__(self, application, user=None):
+        from django.conf import settings
+        from django.test import Client
+
+        self.application = application
+        self.cookies = {}
+        if user is not None:
+            client = Client()
+            client.force_login(user)
+            name = settings.SESSION_COOKIE_NAME
+            self.cookies[name] = client.cookies[name].value
+            html = self.request('GET', '/create/')[1]
+            self.csrf_token = CSRF_INPUT.search(html.decode()).group(1)
+
+    def request(self, method, path, data=None):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            # Не из INTERNAL_IPS: без debug toolbar
+            'REMOTE_ADDR': '10.0.0.1',
+            'HTTP_COOKIE': '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            ),
+        }
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token)
+            body = urlencode(data).encode()
+            environ.update({
+                'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+                'CONTENT_LENGTH': str(len(body)),
+                'wsgi.input': BytesIO(body),
+            })
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = headers
+
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            result.close()
+        for name, value in response['headers']:
+            if name == 'Set-Cookie':
+                cookie = value.split(';')[0]
+                key, _, value = cookie.partition('=')
+                self.cookies[key] = value
+        return response['status'], content
+
+
+def scenarios(users, groups, posts, fake, rng):
+    """(имя, запрос -> (метод, путь, данные), статус, нужен вход)."""
+    return (
+        ('index', lambda: ('GET', '/', None), 200, False),
+        (
+            'group_list',
+            lambda: ('GET', f'/group/{rng.choice(groups).slug}/', None),
+            200,
+            False
+        ),
+        (
+            'profile',
+            lambda: ('GET', f'/profile/{rng.choice(users).username}/', None),
+            200,
+            False
+        ),
+        (
+            'post_detail',
+            lambda: ('GET', f'/posts/{rng.choice(posts).pk}/', None),
+            200,
+            False
+        ),
+        ('follow_index', lambda: ('GET', '/follow/', None), 200, True),
+        (
+            'api_posts',
+            lambda: ('GET', '/api/v1/posts/?expand=author,group', None),
+            200,
+            False
+        ),
+        (
+            'api_group_posts',
+            lambda: (
+                'GET',
+                f'/api/v1/groups/{rng.choice(groups).slug}/posts/',
+                None
+            ),
+            200,
+            False
+        ),
+        (
+            'api_comments',
+            lambda: (
+                'GET',
+                f'/api/v1/posts/{rng.choice(posts).pk}/comments/'
+                '?expand=author',
+                None
+            ),
+            200,
+            False
+        ),
+        ('api_follow', lambda: ('GET', '/api/v1/follow/', None), 200, True),
+        (
+            'post_create',
+            lambda: ('POST', '/create/', dict(
+                text=fake.text(max_nb_chars=400),
+                group=rng.choice(groups).pk
+            )),
+            302,
+            True
+        ),
+        (
+            'add_comment',
+            lambda: (
+                'POST',
+                f'/posts/{rng.choice(posts).pk}/comment/',
+                dict(text=fake.sentence())
+            ),
+            302,
+            True
+        ),
+    )
+
+
+def measure(browsers, request, expected, count, warmup, rng):
+    from django.db import connection
+
+    queries = []
+
+    def counter(execute, sql, params, many, context):
+        queries[-1] += 1
+        return execute(sql, params, many, context)
+
+    timings = []
+    errors = 0
+    for number in range(warmup + count):
+        browser = rng.choice(browsers)
+        method, path, data = request()
+        queries.append(0)
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            status, _ = browser.request(method, path, data)
+            elapsed = time.perf_counter() - started
+        if number < warmup:
+            queries.pop()
+            continue
+        timings.append(elapsed)
+        errors += status != expected
+    return dict(
+        requests=count,
+        errors=errors,
+        rps=count / sum(timings),
+        p50_ms=percentile(timings, 0.5) * 1000,
+        p95_ms=percentile(timings, 0.95) * 1000,
+        p99_ms=percentile(timings, 0.99) * 1000,
+        queries_mean=sum(queries) / len(queries),
+        queries_max=max(queries),
+    )
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT,
+            capture_output=True,
+            text=True
+        ).stdout.strip()
+    except OSError:
+        return ''
+
+
+def compare(baseline, result):
+    """Таблица изменений относительно прошлого прогона, в stderr."""
+    print(
+        f'{"представление":>14} {"p95 было":>9} {"p95 стало":>10} '
+        f'{"SQL было":>9} {"SQL стало":>10}',
+        file=sys.stderr
+    )
+    for name, view in result['views'].items():
+        before = baseline['views'].get(name)
+        if before is None:
+            continue
+        print(
+            f'{name:>14} {before["p95_ms"]:9.1f} {view["p95_ms"]:10.1f} '
+            f'{before["queries_mean"]:9.1f} {view["queries_mean"]:10.1f}',
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument(
+        '--images',
+        type=float,
+        default=0.3,
+        help='Доля постов с картинкой'
+    )
+    parser.add_argument('--comments', type=int, default=3000)
+    parser.add_argument(
+        '--follows',
+        type=int,
+        default=10,
+        help='Подписок у каждого пользователя'
+    )
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=200,
+        help='Измеряемых запросов на представление'
+    )
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--views',
+        nargs='+',
+        help='Только эти представления'
+    )
+    parser.add_argument('--baseline', help='JSON прошлого прогона')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    setup(directory)
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+    import django
+
+    rng = random.Random(args.seed)
+    call_command('migrate', verbosity=0)
+    started = time.perf_counter()
+    users, groups, posts, fake = seed(args, rng)
+    seeded = time.perf_counter() - started
+
+    application = get_wsgi_application()
+    guests = [Browser(application)]
+    members = [Browser(application, user) for user in users[:10]]
+    cache.clear()
+    views = {}
+    for name, request, expected, logged_in in scenarios(
+        users, groups, posts, fake, rng
+    ):
+        if args.views and name not in args.views:
+            continue
+        views[name] = measure(
+            members if logged_in else guests,
+            request,
+            expected,
+            args.requests,
+            args.warmup,
+            rng
+        )
+    shutil.rmtree(directory, ignore_errors=True)
+
+    result = dict(
+        meta=dict(
+            commit=commit(),
+            python=sys.version.split()[0],
+            django=django.get_version(),
+            seed=args.seed,
+            users=args.users,
+            groups=args.groups,
+            posts=args.posts,
+            images=args.images,
+            comments=args.comments,
+            follows=args.follows,
+            requests=args.requests,
+            seed_seconds=round(seeded, 2),
+        ),
+        views=views,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(json.load(file), result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Представления записей API без моделей и DRF.
+
+Строки читаются из базы через values() только с теми колонками,
+которые попросил клиент (?fields=, ?expand=), и превращаются в словари
+готовыми функциями полей: без экземпляров моделей и лишних JOIN.
+"""
+from posts.models import Post
+
+
+class BadQuery(ValueError):
+    pass
+
+
+def _value(value):
+    return value
+
+
+def _datetime(value):
+    return value.isoformat()
+
+
+def _image(name):
+    if not name:
+        return None
+    return Post.image.field.storage.url(name)
+
+
+def _author(pk, username, first_name, last_name):
+    return dict(
+        id=pk,
+        username=username,
+        first_name=first_name,
+        last_name=last_name
+    )
+
+
+def _group(pk, title, slug):
+    if pk is None:
+        return None
+    return dict(id=pk, title=title, slug=slug)
+
+
+# Поле: (колонки для values(), функция от их значений)
+POST_FIELDS = {
+    'id': (('pk',), _value),
+    'text': (('text',), _value),
+    'created': (('created',), _datetime),
+    'image': (('image',), _image),
+    'author': (('author_id',), _value),
+    'group': (('group_id',), _value),
+}
+COMMENT_FIELDS = {
+    'id': (('pk',), _value),
+    'post': (('post_id',), _value),
+    'text': (('text',), _value),
+    'created': (('created',), _datetime),
+    'author': (('author_id',), _value),
+    'parent': (('parent_id',), _value),
+}
+# ?expand= заменяет id вложенным объектом
+EXPANDED = {
+    'author': (
+        (
+            'author_id',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+        ),
+        _author
+    ),
+    'group': (('group_id', 'group__title', 'group__slug'), _group),
+}
+
+
+def _names(value):
+    return [name for name in value.split(',') if name]
+
+
+class Serializer:
+    """Поля записи по ?fields= и ?expand= одного запроса.
+
+    prefix - путь до записи от модели queryset: ленту подписок
+    читаем из TimelineEntry, а отдаем посты ('post__').
+    """
+
+    def __init__(self, fields, params, prefix=''):
+        names = _names(params.get('fields', '')) or list(fields)
+        expand = set(_names(params.get('expand', '')))
+        unknown = (set(names) - fields.keys()) | (expand - EXPANDED.keys())
+        if unknown:
+            raise BadQuery(
+                f'Неизвестные поля: {", ".join(sorted(unknown))}'
+            )
+        self.lookups = []
+        self.renderers = []
+        for name in names:
+            lookups, render = (
+                EXPANDED[name] if name in expand and name in fields
+                else fields[name]
+            )
+            start = len(self.lookups)
+            self.lookups.extend(prefix + lookup for lookup in lookups)
+            self.renderers.append(
+                (name, render, start, start + len(lookups))
+            )
+
+    def values(self, queryset):
+        """Queryset строк: кортежи (pk, created, колонки полей...)."""
+        return queryset.values_list('pk', 'created', *self.lookups)
+
+    def render(self, row):
+        values = row[2:]
+        return {
+            name: render(*values[start:stop])
+            for name, render, start, stop in self.renderers
+        }
@@ -0,0 +1,149 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.reader = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group if number % 2 else None,
+                text=f'{consts.POST_TEXT} {number}'
+            )
+            for number in range(5)
+        ]
+        Post.objects.create(author=cls.reader, text=consts.POST_TEXT)
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.reader,
+            text=consts.COMMENT_TEXT
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, name, kwargs=None, **params):
+        response = self.client.get(reverse(name, kwargs=kwargs), params)
+        return response, response.json()
+
+    def test_cursor_pagination(self):
+        """Курсоры next/previous проходят ленту без пропусков."""
+        response, data = self.get('api:v1:posts', limit=4, fields='id')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIsNone(data['previous'])
+        ids = [post['id'] for post in data['results']]
+        next_page = self.client.get(data['next']).json()
+        ids += [post['id'] for post in next_page['results']]
+        self.assertIsNone(next_page['next'])
+        self.assertEqual(
+            ids,
+            list(
+                Post.objects.order_by('-created', '-pk').values_list(
+                    'pk',
+                    flat=True
+                )
+            )
+        )
+        previous_page = self.client.get(next_page['previous']).json()
+        self.assertEqual(previous_page['results'], data['results'])
+
+    def test_forged_cursor_gives_first_page(self):
+        """Курсор с id вне INTEGER базы - как мусор, а не 500."""
+        _, first_page = self.get('api:v1:posts', fields='id')
+        response, data = self.get(
+            'api:v1:posts',
+            fields='id',
+            after='MjAyMC0wMS0wMVQwMDowMDowMCswMDowMHwxMjM0NTY3ODkwMTIzNDU2'
+                  'Nzg5MDEyMw'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(data['results'], first_page['results'])
+
+    def test_sparse_fields_and_expand(self):
+        """?fields= оставляет только нужные поля, ?expand= - вложенные."""
+        _, data = self.get(
+            'api:v1:group_posts',
+            {'slug': consts.GROUP_SLUG},
+            fields='id,author,group',
+            expand='author,group'
+        )
+        self.assertEqual(
+            data['results'][0],
+            dict(
+                id=self.posts[3].pk,
+                author=dict(
+                    id=self.user.pk,
+                    username=self.user.username,
+                    first_name='',
+                    last_name=''
+                ),
+                group=dict(
+                    id=self.group.pk,
+                    title=consts.GROUP_TITLE,
+                    slug=consts.GROUP_SLUG
+                )
+            )
+        )
+        _, data = self.get('api:v1:posts', fields='author,group')
+        self.assertEqual(
+            data['results'][1],
+            dict(author=self.user.pk, group=None)
+        )
+
+    def test_comments_and_follow(self):
+        _, data = self.get(
+            'api:v1:post_comments',
+            {'post_id': self.posts[0].pk}
+        )
+        self.assertEqual(
+            data['results'],
+            [dict(
+                id=self.comment.pk,
+                post=self.posts[0].pk,
+                text=consts.COMMENT_TEXT,
+                created=self.comment.created.isoformat(),
+                author=self.reader.pk,
+                parent=None
+            )]
+        )
+        response, _ = self.get('api:v1:follow')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.client.force_login(self.reader)
+        # Сессия уже в кеше, пользователь после входа - еще нет
+        with self.assertNumQueries(2):
+            _, data = self.get('api:v1:follow', fields='id', expand='author')
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.pk for post in reversed(self.posts)]
+        )
+
+    def test_bad_queries(self):
+        for name, kwargs, params, status in (
+            ('api:v1:posts', None, {'fields': 'password'}, 400),
+            ('api:v1:posts', None, {'expand': 'post'}, 400),
+            ('api:v1:posts', None, {'limit': '1000'}, 400),
+            ('api:v1:group_posts', {'slug': 'missing'}, {}, 404),
+            ('api:v1:post_comments', {'post_id': 10 ** 6}, {}, 404),
+        ):
+            with self.subTest(name=name, params=params):
+                response, data = self.get(name, kwargs, **params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', data)
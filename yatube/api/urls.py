@@ -0,0 +1,33 @@
+from django.urls import include, path
+
+from . import views
+
+
+app_name = 'api'
+
+v1_patterns = [
+    path(
+        'posts/',
+        views.posts,
+        name='posts'
+    ),
+    path(
+        'groups/<slug:slug>/posts/',
+        views.group_posts,
+        name='group_posts'
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        'follow/',
+        views.follow,
+        name='follow'
+    ),
+]
+
+urlpatterns = [
+    path('v1/', include((v1_patterns, 'v1'))),
+]
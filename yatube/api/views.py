@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+from django.http import JsonResponse
+
+from posts.models import Comment, Group, Post
+from posts.utils import CursorPaginator
+from .serializers import (
+    BadQuery, COMMENT_FIELDS, POST_FIELDS, Serializer
+)
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def _row_key(row):
+    pk, created = row[:2]
+    return created, pk
+
+
+def _error(message, status):
+    return JsonResponse(
+        dict(detail=message),
+        status=status,
+        json_dumps_params=dict(ensure_ascii=False)
+    )
+
+
+def _page_url(request, cursor, direction):
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[direction] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def _list(request, queryset, fields, prefix=''):
+    """Страница записей по курсору: {results, next, previous}."""
+    try:
+        serializer = Serializer(fields, request.GET, prefix)
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError
+    except BadQuery as error:
+        return _error(str(error), HTTPStatus.BAD_REQUEST)
+    except ValueError:
+        return _error(
+            f'limit - число от 1 до {MAX_LIMIT}',
+            HTTPStatus.BAD_REQUEST
+        )
+    page = CursorPaginator(
+        serializer.values(queryset),
+        limit,
+        key=_row_key
+    ).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
+    )
+    return JsonResponse(
+        dict(
+            results=[serializer.render(row) for row in page],
+            next=page.next_cursor and _page_url(
+                request, page.next_cursor, 'after'
+            ),
+            previous=page.previous_cursor and _page_url(
+                request, page.previous_cursor, 'before'
+            ),
+        ),
+        json_dumps_params=dict(ensure_ascii=False)
+    )
+
+
+def posts(request):
+    return _list(request, Post.objects.all(), POST_FIELDS)
+
+
+def group_posts(request, slug):
+    group_id = Group.objects.filter(
+        slug=slug
+    ).values_list('pk', flat=True).first()
+    if group_id is None:
+        return _error('Группа не найдена', HTTPStatus.NOT_FOUND)
+    return _list(request, Post.objects.filter(group_id=group_id), POST_FIELDS)
+
+
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return _error('Пост не найден', HTTPStatus.NOT_FOUND)
+    return _list(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS
+    )
+
+
+def follow(request):
+    """Лента подписок из материализованных записей TimelineEntry."""
+    if not request.user.is_authenticated:
+        return _error('Нужно войти', HTTPStatus.UNAUTHORIZED)
+    return _list(request, request.user.timeline.all(), POST_FIELDS, 'post__')
@@ -1,5 +1,18 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import auth, metrics, querylog
+        from .sqlite import apply_pragmas
+        connection_created.connect(apply_pragmas)
+        connection_created.connect(querylog.attach)
+        post_save.connect(auth.forget_user, sender=get_user_model())
+        post_delete.connect(auth.forget_user, sender=get_user_model())
+        metrics.install()
+        querylog.install()
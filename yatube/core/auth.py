@@ -0,0 +1,46 @@
+"""Пользователь запроса из кеша, а не из auth_user.
+
+AuthenticationMiddleware на каждом запросе вошедшего пользователя
+получает его через backend.get_user(), то есть SELECT из auth_user.
+CachedModelBackend сначала ищет пользователя в кеше USER_CACHE_ALIAS
+(файловый кеш, общий для всех воркеров), а сигналы сохранения и
+удаления пользователя сбрасывают запись. Хеш сессии после смены
+пароля django.contrib.auth сверяет и с пользователем из кеша, так
+что чужие сессии по-прежнему разлогиниваются.
+
+QuerySet.update() и bulk-операции сигналов не шлют: например,
+User.objects.filter(...).update(is_active=False) заметят запросы
+только через USER_CACHE_SECONDS. После таких изменений нужно вызвать
+forget(pk) для каждого затронутого пользователя.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def _key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def _cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        user = _cache().get(_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            _cache().set(_key(user_id), user, settings.USER_CACHE_SECONDS)
+        return user if self.user_can_authenticate(user) else None
+
+
+def forget(user_id):
+    _cache().delete(_key(user_id))
+
+
+def forget_user(sender, instance, **kwargs):
+    """Обработчик post_save и post_delete пользователя."""
+    forget(instance.pk)
@@ -0,0 +1,27 @@
+"""Файловый кеш, запись в который не зависит от числа записей.
+
+FileBasedCache в Django 2.2 перед каждой записью вызывает _cull(), а
+тот листает весь каталог кеша, чтобы сосчитать файлы: при MAX_ENTRIES
+100000 каждая запись сессии стоит обхода ста тысяч файлов. FileCache
+считает файлы раз в CULL_EVERY записей процесса, поэтому в среднем
+запись - O(1), а кеш превышает MAX_ENTRIES не больше чем на CULL_EVERY
+записей на воркер. Счетчик общий для процесса: Django создает объект
+кеша в каждом потоке, а runserver заводит поток на каждый запрос.
+"""
+from itertools import count
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+_writes = count(1)
+
+
+class FileCache(FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._cull_every = int(options.get('CULL_EVERY', 1000))
+
+    def _cull(self):
+        if next(_writes) % self._cull_every == 0:
+            super()._cull()
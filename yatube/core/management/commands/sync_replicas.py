@@ -0,0 +1,34 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу default в файлы реплик SQLite '
+        '(онлайн-бэкап, запись в default не останавливается)'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены, задайте YATUBE_SQLITE_REPLICAS'
+            )
+        primary = connections['default']
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            # Время до начала копии: все записанное раньше в нее попадет
+            started = time.time_ns() // 1000
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            replicas.mark_synced(alias, started)
+            self.stdout.write(self.style.SUCCESS(f'{alias} обновлена'))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from core import querylog
+
+
+ORDERS = {
+    'total': lambda stat: stat[1],
+    'count': lambda stat: stat[0],
+    'p95': lambda stat: stat[2],
+}
+FINGERPRINT_WIDTH = 160
+
+
+class Command(BaseCommand):
+    help = (
+        'Самые тяжелые запросы по отпечаткам SQL '
+        '(нужен QUERY_LOG_ENABLED = True)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--order',
+            choices=ORDERS,
+            default='total',
+            help='Сортировка: суммарное время, число запросов или p95'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Не обрезать отпечатки'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Удалить накопленную статистику'
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            querylog.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Статистика удалена'))
+            return
+        stats = querylog.load_stats()
+        if not stats:
+            self.stdout.write('Статистики пока нет')
+            return
+        order = ORDERS[options['order']]
+        top = sorted(
+            stats.items(),
+            key=lambda item: order(item[1]),
+            reverse=True
+        )[:options['limit']]
+        self.stdout.write(
+            f'{"всего мс":>10} {"запросов":>9} {"сред. мс":>9} '
+            f'{"p95 мс":>8}  отпечаток'
+        )
+        for key, (count, total, p95) in top:
+            if not options['full'] and len(key) > FINGERPRINT_WIDTH:
+                key = key[:FINGERPRINT_WIDTH - 3] + '...'
+            self.stdout.write(
+                f'{total * 1000:10.1f} {count:9} '
+                f'{total * 1000 / count:9.2f} {p95 * 1000:8.2f}  {key}'
+            )
@@ -0,0 +1,217 @@
+"""Метрики запросов в формате Prometheus.
+
+MetricsMiddleware для каждого представления (posts:index,
+posts:follow_index, ...) собирает гистограммы времени ответа, числа и
+времени запросов к базе, времени рендера шаблонов и размера ответа.
+Отдает их /metrics. Гистограммы живут в памяти процесса: при
+нескольких воркерах Prometheus опрашивает каждый из них.
+
+При METRICS_ENABLED = False middleware исключается из цепочки
+(MiddlewareNotUsed), а рендер шаблонов не оборачивается.
+"""
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+
+# Верхние границы корзин гистограмм
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+METRICS = (
+    (
+        'yatube_request_duration_seconds',
+        'Время ответа представления',
+        DURATION_BUCKETS,
+    ),
+    (
+        'yatube_db_queries',
+        'Число запросов к базе за ответ',
+        QUERY_BUCKETS,
+    ),
+    (
+        'yatube_db_duration_seconds',
+        'Время запросов к базе за ответ',
+        DURATION_BUCKETS,
+    ),
+    (
+        'yatube_template_duration_seconds',
+        'Время рендера шаблонов за ответ',
+        DURATION_BUCKETS,
+    ),
+    (
+        'yatube_response_size_bytes',
+        'Размер тела ответа',
+        SIZE_BUCKETS,
+    ),
+)
+UNRESOLVED = '<unresolved>'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Гистограммы по (метрика, представление)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, view_name, values):
+        with self.lock:
+            for (name, _, buckets), value in zip(METRICS, values):
+                key = (name, view_name)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(buckets)
+                self.histograms[key].observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        lines = []
+        with self.lock:
+            for name, help_text, _ in METRICS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, view_name), histogram in sorted(
+                    self.histograms.items()
+                ):
+                    if metric != name:
+                        continue
+                    label = view_name.replace('\\', '\\\\').replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(
+                        histogram.buckets,
+                        histogram.counts
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f'{name}_bucket{{view="{label}",le="{bound}"}} '
+                            f'{cumulative}'
+                        )
+                    lines.append(
+                        f'{name}_bucket{{view="{label}",le="+Inf"}} '
+                        f'{histogram.count}'
+                    )
+                    lines.append(
+                        f'{name}_sum{{view="{label}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{name}_count{{view="{label}"}} {histogram.count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class _RequestMetrics:
+    def __init__(self):
+        self.view_name = UNRESOLVED
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        # Вложенные шаблоны ({% include %}) уже учтены во внешнем
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, context)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+    return wrapper
+
+
+def install():
+    """Оборачивает рендер шаблонов, если метрики включены."""
+    if getattr(settings, 'METRICS_ENABLED', False) and not getattr(
+        Template.render, '_metrics', False
+    ):
+        Template.render = _timed_render(Template.render)
+        Template.render._metrics = True
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+        if metrics.view_name == 'metrics':
+            return response
+        size = (
+            len(response.content) if not response.streaming else 0
+        )
+        registry.observe(metrics.view_name, (
+            duration,
+            metrics.queries,
+            metrics.db_time,
+            metrics.template_time,
+            size,
+        ))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_name = request.resolver_match.view_name
@@ -0,0 +1,237 @@
+"""Журнал медленных запросов к базе.
+
+При QUERY_LOG_ENABLED каждое соединение получает execute wrapper
+(см. CoreConfig.ready). Он сводит SQL к отпечатку - литералы и
+параметры заменены на ?, списки IN (...) и VALUES свернуты, - и копит
+по отпечатку число запросов, суммарное время и выборку длительностей
+для p95. Запросы дольше QUERY_LOG_SLOW_MS пишутся в
+QUERY_LOG_DIR/slow_queries.log (с ротацией) вместе с представлением и
+строкой нашего кода, откуда пришел запрос.
+
+Статистика процесса раз в FLUSH_SECONDS сбрасывается в
+QUERY_LOG_DIR/stats/<pid>.json, команда top_queries сводит эти файлы.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+LOG_NAME = 'slow_queries.log'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+STATS_DIR = 'stats'
+FLUSH_SECONDS = 10
+# Сколько последних длительностей отпечатка хранится для p95
+SAMPLES = 500
+NO_VIEW = '-'
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_SPACES = re.compile(r'\s+')
+_GROUP = re.compile(r'\(\?(?:, \?)*\)')
+_GROUPS = re.compile(r'\(\.\.\.\)(?:, \(\.\.\.\))+')
+
+logger = logging.getLogger('yatube.querylog')
+logger.propagate = False
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """SQL без значений: одинаковые запросы с разными id совпадают."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _SPACES.sub(' ', sql).strip()
+    sql = _GROUP.sub('(...)', sql)
+    return _GROUPS.sub('(...)', sql)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _origin():
+    """Последний кадр стека из кода проекта, а не Django."""
+    root = settings.BASE_DIR + os.sep
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if (
+            frame.filename.startswith(root)
+            and 'site-packages' not in frame.filename
+        ):
+            path = os.path.relpath(frame.filename, settings.BASE_DIR)
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return '-'
+
+
+def _log_handler():
+    path = os.path.join(settings.QUERY_LOG_DIR, LOG_NAME)
+    for handler in list(logger.handlers):
+        if handler.baseFilename == path:
+            return
+        logger.removeHandler(handler)
+        handler.close()
+    os.makedirs(settings.QUERY_LOG_DIR, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUPS,
+        encoding='utf-8'
+    )
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+
+
+class _Stat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.flushed = time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, duration):
+        key = fingerprint(sql)
+        with self.lock:
+            stat = self.stats.get(key)
+            if stat is None:
+                stat = self.stats[key] = _Stat()
+            stat.count += 1
+            stat.total += duration
+            stat.samples.append(duration)
+        if duration * 1000 >= settings.QUERY_LOG_SLOW_MS:
+            _log_handler()
+            logger.warning(
+                '%.1f ms view=%s at %s\n    %s',
+                duration * 1000,
+                _view.get(),
+                _origin(),
+                key
+            )
+
+    def clear(self):
+        with self.lock:
+            self.stats.clear()
+
+    def flush(self, force=False):
+        """Сохраняет статистику процесса для top_queries."""
+        if not force and time.monotonic() - self.flushed < FLUSH_SECONDS:
+            return
+        with self.lock:
+            self.flushed = time.monotonic()
+            data = {
+                key: dict(
+                    count=stat.count,
+                    total=stat.total,
+                    samples=list(stat.samples)
+                )
+                for key, stat in self.stats.items()
+            }
+        if not data:
+            return
+        directory = os.path.join(settings.QUERY_LOG_DIR, STATS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(data, file)
+        os.replace(f'{path}.tmp', path)
+
+
+recorder = QueryRecorder()
+_view = ContextVar('query_view', default=NO_VIEW)
+
+
+def load_stats():
+    """Сводит статистику всех процессов: {отпечаток: (count, total, p95)}."""
+    directory = os.path.join(settings.QUERY_LOG_DIR, STATS_DIR)
+    merged = {}
+    if not os.path.isdir(directory):
+        return {}
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name)) as file:
+            data = json.load(file)
+        for key, stat in data.items():
+            count, total, samples = merged.get(key, (0, 0.0, []))
+            merged[key] = (
+                count + stat['count'],
+                total + stat['total'],
+                samples + stat['samples'],
+            )
+    return {
+        key: (count, total, percentile(samples, 0.95))
+        for key, (count, total, samples) in merged.items()
+    }
+
+
+def reset_stats():
+    recorder.clear()
+    directory = os.path.join(settings.QUERY_LOG_DIR, STATS_DIR)
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+
+def attach(sender=None, connection=None, **kwargs):
+    """Обработчик connection_created."""
+    if (
+        getattr(settings, 'QUERY_LOG_ENABLED', False)
+        and recorder not in connection.execute_wrappers
+    ):
+        # В начало списка: connection.execute_wrapper() снимает свою
+        # обертку через pop() и не должен снять нашу
+        connection.execute_wrappers.insert(0, recorder)
+
+
+def install():
+    if getattr(settings, 'QUERY_LOG_ENABLED', False):
+        atexit.register(recorder.flush, force=True)
+
+
+class QueryLogMiddleware:
+    """Отмечает запросы к базе именем представления."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _view.set(NO_VIEW)
+        try:
+            return self.get_response(request)
+        finally:
+            _view.reset(token)
+            recorder.flush()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _view.set(request.resolver_match.view_name)
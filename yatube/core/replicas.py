@@ -0,0 +1,121 @@
+"""Чтение лент с реплик базы.
+
+ReplicaMiddleware отмечает GET-запросы к представлениям из
+REPLICA_VIEWS, и на время такого запроса ReplicaRouter отправляет все
+чтения на одну случайную реплику из DATABASE_REPLICAS. Запись всегда
+идет в default. Записавший пользователь получает cookie и
+REPLICA_PIN_SECONDS секунд читает с default, чтобы сразу увидеть свой
+пост или комментарий, даже если реплика отстает.
+
+sync_replicas записывает время снимка каждой реплики в общий кеш
+REPLICA_CACHE_ALIAS: по нему кеш лент отличает страницы, прочитанные
+с отставшей реплики (posts.feed_cache).
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+PIN_COOKIE = 'pin_primary'
+# Сессии всегда читаются с default: иначе сразу после входа
+# пользователь мог бы оказаться разлогинен отставшей репликой
+PRIMARY_ONLY_APPS = ('sessions',)
+
+
+class _RequestState:
+    def __init__(self):
+        # Реплика, с которой читает запрос, None - читать с default
+        self.replica = None
+        self.wrote = False
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _synced_key(alias):
+    return f'replica_synced:{alias}'
+
+
+def current_replica():
+    """Реплика, с которой читает текущий запрос, или None."""
+    state = _state.get()
+    return None if state is None else state.replica
+
+
+def mark_synced(alias, stamp=None):
+    """Запоминает время снимка реплики в микросекундах."""
+    if stamp is None:
+        stamp = time.time_ns() // 1000
+    caches[settings.REPLICA_CACHE_ALIAS].set(_synced_key(alias), stamp, None)
+
+
+def synced_at(alias):
+    """Время снимка реплики в микросекундах, None - неизвестно."""
+    return caches[settings.REPLICA_CACHE_ALIAS].get(_synced_key(alias))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии default, объекты с них можно смешивать
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in _replicas():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None:
+            return None
+        if (
+            _replicas()
+            and request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and PIN_COOKIE not in request.COOKIES
+        ):
+            # Одна реплика на запрос: COUNT и страница ленты читаются
+            # из одного снимка
+            state.replica = random.choice(_replicas())
+        return None
@@ -0,0 +1,22 @@
+"""Профиль PRAGMA для соединений с SQLite.
+
+Применяется к каждому новому соединению (сигнал connection_created).
+Профиль берется из настройки SQLITE_PRAGMAS, у отдельной базы его можно
+дополнить или переопределить ключом DATABASES[alias]['PRAGMAS'].
+"""
+from django.conf import settings
+
+
+def pragmas_for(connection):
+    """PRAGMA для соединения: общий профиль плюс настройки базы."""
+    pragmas = dict(getattr(settings, 'SQLITE_PRAGMAS', {}))
+    pragmas.update(connection.settings_dict.get('PRAGMAS', {}))
+    return pragmas
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas_for(connection).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,45 @@
+"""Помощники для тестов."""
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+# Кеши для override_settings(CACHES=...): тест, который чистит кеш
+# сессий, не трогает файлы настоящих сессий в BASE_DIR/cache
+LOCAL_CACHES = {
+    **settings.CACHES,
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+}
+
+
+class query_budget(ContextDecorator, CaptureQueriesContext):
+    """Не больше budget запросов к базе в блоке или тесте.
+
+        with query_budget(5):
+            client.get(url)
+
+        @query_budget(5)
+        def test_feed(self):
+            ...
+    """
+
+    def __init__(self, budget, using='default'):
+        super().__init__(connections[using])
+        self.budget = budget
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self) > self.budget:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(self.captured_queries, 1)
+            )
+            raise AssertionError(
+                f'{len(self)} запросов к базе при бюджете '
+                f'{self.budget}:\n{queries}'
+            )
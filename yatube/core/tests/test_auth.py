@@ -0,0 +1,83 @@
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import auth
+from core.testing import LOCAL_CACHES
+from posts.models import User
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CachedAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username='auth', password='old-password')
+
+    def setUp(self):
+        self.user = User.objects.get(username='auth')
+        cache.clear()
+        caches['sessions'].clear()
+        self.client = Client()
+        self.client.login(username='auth', password='old-password')
+        self.url = reverse('posts:follow_index')
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        tables = {
+            table
+            for query in queries.captured_queries
+            for table in ('django_session', 'auth_user')
+            if f'"{table}"' in query['sql']
+        }
+        return response.wsgi_request.user, tables
+
+    def test_repeat_request_skips_session_and_user(self):
+        """Повторный запрос не читает ни сессию, ни пользователя."""
+        self.get()
+        user, tables = self.get()
+        self.assertEqual(user, self.user)
+        self.assertEqual(tables, set())
+
+    def test_user_save_invalidates_cache(self):
+        """Изменения пользователя видны на следующем запросе."""
+        self.get()
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        user, tables = self.get()
+        self.assertEqual(user.first_name, 'Новое имя')
+        self.assertEqual(tables, {'auth_user'})
+
+    def test_password_change_logs_out(self):
+        """После смены пароля сессия из кеша больше не действует."""
+        self.get()
+        self.user.set_password('new-password')
+        self.user.save()
+        user, _ = self.get()
+        self.assertTrue(user.is_anonymous)
+
+    def test_inactive_user_is_anonymous(self):
+        self.get()
+        self.user.is_active = False
+        self.user.save()
+        user, _ = self.get()
+        self.assertTrue(user.is_anonymous)
+
+    def test_update_without_signals_needs_forget(self):
+        """QuerySet.update() виден после forget() пользователя."""
+        self.get()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        auth.forget(self.user.pk)
+        user, _ = self.get()
+        self.assertTrue(user.is_anonymous)
+
+    def test_session_of_model_backend_still_works(self):
+        """Сессии, открытые через ModelBackend, не разлогиниваются."""
+        self.client.force_login(
+            self.user,
+            backend='django.contrib.auth.backends.ModelBackend'
+        )
+        user, _ = self.get()
+        self.assertEqual(user, self.user)
@@ -0,0 +1,38 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import SimpleTestCase
+
+from core.cache import FileCache
+
+
+class FileCacheTests(SimpleTestCase):
+    def make_cache(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return FileCache(directory.name, {'OPTIONS': options}), directory.name
+
+    def test_directory_is_listed_once_per_cull_every(self):
+        """Каталог листается раз в CULL_EVERY записей, а не на каждой."""
+        cache, _ = self.make_cache(MAX_ENTRIES=1000, CULL_EVERY=10)
+        with mock.patch.object(
+            FileBasedCache,
+            '_list_cache_files',
+            autospec=True,
+            return_value=[]
+        ) as listing:
+            for number in range(30):
+                cache.set(f'key {number}', number)
+        self.assertEqual(listing.call_count, 3)
+
+    def test_entries_are_still_culled(self):
+        cache, directory = self.make_cache(
+            MAX_ENTRIES=10,
+            CULL_EVERY=5,
+            CULL_FREQUENCY=2
+        )
+        for number in range(40):
+            cache.set(f'key {number}', number)
+        self.assertLess(len(os.listdir(directory)), 10 + 5)
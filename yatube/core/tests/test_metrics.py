@@ -0,0 +1,78 @@
+import re
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from core.metrics import registry
+from posts.models import Post, User
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый текст поста')
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+    def sample(self, text, metric, view):
+        match = re.search(
+            rf'^{metric}{{view="{re.escape(view)}"}} (\S+)$',
+            text,
+            re.MULTILINE
+        )
+        self.assertIsNotNone(match, f'Нет {metric} для {view}')
+        return float(match.group(1))
+
+    def test_view_metrics_exported(self):
+        """Ответы представлений попадают в гистограммы /metrics."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', text)
+        self.assertEqual(
+            self.sample(
+                text,
+                'yatube_request_duration_seconds_count',
+                'posts:index'
+            ),
+            2
+        )
+        self.assertIn(
+            'yatube_db_queries_bucket{view="posts:index",le="+Inf"} 2',
+            text
+        )
+        for metric in (
+            'yatube_db_queries_sum',
+            'yatube_db_duration_seconds_sum',
+            'yatube_template_duration_seconds_sum',
+            'yatube_response_size_bytes_sum',
+        ):
+            with self.subTest(metric=metric):
+                self.assertGreater(
+                    self.sample(text, metric, 'posts:index'),
+                    0
+                )
+        # Сам /metrics в гистограммы не попадает
+        self.assertNotIn('view="metrics"', text)
+
+    def test_metrics_closed_for_other_addresses(self):
+        response = Client(REMOTE_ADDR='10.0.0.1').get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_metrics_are_not_collected(self):
+        client = Client()
+        client.get(reverse('posts:index'))
+        self.assertEqual(registry.render().count('_count{'), 0)
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
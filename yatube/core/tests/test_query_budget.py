@@ -0,0 +1,212 @@
+import shutil
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, override_settings, TestCase
+from django.urls import get_resolver, reverse
+
+from core.testing import query_budget
+from posts import consts, thumbnails
+from posts.models import Comment, Follow, Group, Post, User
+
+
+# Сколько раз по странице ленты в базе
+PAGES = 3
+# (имя url, аргументы, метод, от пользователя, бюджет запросов).
+# Кэш пуст, а валидатор условного GET ищет id группы, автора или
+# поста. У комментариев поста есть ветки ответов: их первые ответы
+# выбираются двумя запросами на всю страницу. Сессия вошедшего
+# пользователя читается из кеша, а сам он после входа - еще из базы
+BUDGETS = (
+    ('posts:index', {}, 'get', False, 2),
+    ('posts:group_list', {'slug': consts.GROUP_SLUG}, 'get', False, 4),
+    (
+        'posts:profile',
+        {'username': consts.FIRST_USER_USERNAME},
+        'get',
+        False,
+        4
+    ),
+    ('posts:post_detail', {'post_id': 'post'}, 'get', False, 6),
+    ('posts:search', {}, 'get', False, 3),
+    ('posts:follow_index', {}, 'get', True, 3),
+    ('posts:post_create', {}, 'get', True, 2),
+    ('posts:post_edit', {'post_id': 'post'}, 'get', True, 4),
+    ('posts:post_comments', {'post_id': 'post'}, 'get', False, 5),
+    (
+        'posts:comment_replies',
+        {'post_id': 'post', 'comment_id': 'comment'},
+        'get',
+        False,
+        3
+    ),
+    ('posts:add_comment', {'post_id': 'post'}, 'post', True, 9),
+    ('posts:index_rss', {}, 'get', False, 1),
+    ('posts:index_atom', {}, 'get', False, 1),
+    ('posts:group_rss', {'slug': consts.GROUP_SLUG}, 'get', False, 3),
+    ('posts:group_atom', {'slug': consts.GROUP_SLUG}, 'get', False, 3),
+    (
+        'posts:profile_rss',
+        {'username': consts.FIRST_USER_USERNAME},
+        'get',
+        False,
+        3
+    ),
+    (
+        'posts:profile_atom',
+        {'username': consts.FIRST_USER_USERNAME},
+        'get',
+        False,
+        3
+    ),
+    (
+        'posts:profile_follow',
+        {'username': consts.USER_USERNAME},
+        'get',
+        True,
+        9
+    ),
+    (
+        'posts:profile_unfollow',
+        {'username': consts.USER_USERNAME},
+        'get',
+        True,
+        9
+    ),
+    ('users:signup', {}, 'get', False, 0),
+    ('users:login', {}, 'get', False, 0),
+    ('users:logout', {}, 'get', True, 3),
+    ('about:author', {}, 'get', False, 0),
+    ('about:tech', {}, 'get', False, 0),
+    ('api:v1:posts', {}, 'get', False, 1),
+    ('api:v1:group_posts', {'slug': consts.GROUP_SLUG}, 'get', False, 2),
+    ('api:v1:post_comments', {'post_id': 'post'}, 'get', False, 2),
+    ('api:v1:follow', {}, 'get', True, 2),
+)
+# Ленты с паджинацией: их бюджет не должен зависеть от размера страницы
+FEEDS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:search',
+    'posts:follow_index',
+)
+PAGE_SIZES = (consts.MAX_POSTS_DISPLAYED, consts.MAX_POSTS_DISPLAYED * 2)
+# Каждый url этих пространств имен должен быть в BUDGETS
+NAMESPACES = ('posts', 'users', 'about', 'api:v1')
+
+
+@override_settings(MEDIA_ROOT=consts.TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class QueryBudgetTests(TestCase):
+    """Число запросов страниц не растет вместе с лентой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username='reader'
+        )
+        cls.other = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for number in range(consts.MAX_POSTS_DISPLAYED * 2 * PAGES):
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'{consts.POST_TEXT} {number}',
+                image=SimpleUploadedFile(
+                    name=consts.IMAGE_NAME,
+                    content=consts.SMALL_GIF,
+                    content_type='image/gif'
+                ) if number % 2 else ''
+            )
+        thumbnails.run_pending()
+        cls.post = Post.objects.filter(image='').first()
+        for author in (cls.user, cls.reader, cls.other) * 5:
+            cls.comment = Comment.objects.create(
+                post=cls.post,
+                author=author,
+                text=consts.COMMENT_TEXT
+            )
+            parent = cls.comment
+            for reply_author in (cls.user, cls.reader, cls.other):
+                parent = Comment.objects.create(
+                    post=cls.post,
+                    author=reply_author,
+                    parent=parent,
+                    text=consts.COMMENT_TEXT
+                )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(consts.TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def request(self, name, kwargs, method, logged_in):
+        kwargs = {
+            key: dict(post=self.post.pk, comment=self.comment.pk).get(
+                value,
+                value
+            )
+            for key, value in kwargs.items()
+        }
+        client = Client()
+        if logged_in:
+            client.force_login(self.user if 'edit' in name else self.reader)
+        data = {'text': consts.COMMENT_TEXT} if method == 'post' else {}
+        if name == 'posts:search':
+            data = {'q': consts.POST_TEXT}
+        cache.clear()
+        url = reverse(name, kwargs=kwargs)
+        return lambda: getattr(client, method)(url, data)
+
+    def test_budgets(self):
+        for name, kwargs, method, logged_in, budget in BUDGETS:
+            with self.subTest(url=name):
+                send = self.request(name, kwargs, method, logged_in)
+                with query_budget(budget):
+                    send()
+
+    def test_every_url_has_budget(self):
+        """Новый url без бюджета не проходит незамеченным."""
+        budgeted = {name for name, *_ in BUDGETS}
+        for namespace in NAMESPACES:
+            resolver = get_resolver()
+            for part in namespace.split(':'):
+                _, resolver = resolver.namespace_dict[part]
+            names = {
+                f'{namespace}:{name}'
+                for name in resolver.reverse_dict
+                if isinstance(name, str)
+            }
+            with self.subTest(namespace=namespace):
+                self.assertEqual(names - budgeted, set())
+
+    def test_budget_ignores_page_size(self):
+        """Страница вдвое больше не добавляет ни одного запроса."""
+        for name, kwargs, method, logged_in, _ in BUDGETS:
+            if name not in FEEDS:
+                continue
+            with self.subTest(url=name):
+                counts = []
+                for size in PAGE_SIZES:
+                    send = self.request(name, kwargs, method, logged_in)
+                    with mock.patch(
+                        'posts.utils.MAX_POSTS_DISPLAYED', size
+                    ), mock.patch(
+                        'posts.views.MAX_POSTS_DISPLAYED', size
+                    ), query_budget(1000) as queries:
+                        response = send()
+                    self.assertEqual(
+                        len(response.context['page_obj']),
+                        size
+                    )
+                    counts.append(len(queries))
+                self.assertEqual(counts[0], counts[1])
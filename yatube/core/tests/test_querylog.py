@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from core import querylog
+from posts.models import Post, User
+
+
+LOG_DIR = tempfile.mkdtemp()
+
+
+class FingerprintTests(TestCase):
+    def test_values_are_removed(self):
+        """Запросы с разными значениями дают один отпечаток."""
+        self.assertEqual(
+            querylog.fingerprint(
+                'SELECT * FROM "posts_post" WHERE "id" = 15 '
+                "AND text = 'it''s'\n  LIMIT 10 OFFSET 20"
+            ),
+            'SELECT * FROM "posts_post" WHERE "id" = ? '
+            'AND text = ? LIMIT ? OFFSET ?'
+        )
+
+    def test_lists_are_collapsed(self):
+        self.assertEqual(
+            querylog.fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+            querylog.fingerprint('SELECT 1 FROM t WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            querylog.fingerprint(
+                'INSERT INTO t2 (a, b) VALUES (%s, %s), (%s, %s)'
+            ),
+            'INSERT INTO t2 (a, b) VALUES (...)'
+        )
+
+
+@override_settings(
+    QUERY_LOG_ENABLED=True,
+    QUERY_LOG_SLOW_MS=0,
+    QUERY_LOG_DIR=LOG_DIR
+)
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый текст поста')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for handler in list(querylog.logger.handlers):
+            querylog.logger.removeHandler(handler)
+            handler.close()
+        shutil.rmtree(LOG_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        querylog.reset_stats()
+        querylog.attach(connection=connection)
+        self.addCleanup(connection.execute_wrappers.remove, querylog.recorder)
+
+    def test_slow_queries_are_logged_with_view(self):
+        """Медленный запрос попадает в журнал с представлением и кодом."""
+        Client().get(reverse('posts:index'))
+        with open(os.path.join(LOG_DIR, querylog.LOG_NAME)) as file:
+            log = file.read()
+        self.assertIn('view=posts:index at posts/', log)
+        self.assertIn('FROM "posts_post"', log)
+
+    def test_top_queries(self):
+        """top_queries выводит отпечатки из сохраненной статистики."""
+        for _ in range(3):
+            list(Post.objects.filter(text='Пост'))
+        querylog.recorder.flush(force=True)
+        stats = querylog.load_stats()
+        self.assertEqual(
+            [
+                count for key, (count, _, _) in stats.items()
+                if '"text" = ?' in key
+            ],
+            [3]
+        )
+        out = StringIO()
+        call_command('top_queries', '--full', stdout=out)
+        self.assertIn('FROM "posts_post" WHERE', out.getvalue())
+        call_command('top_queries', '--reset', stdout=StringIO())
+        self.assertEqual(querylog.load_stats(), {})
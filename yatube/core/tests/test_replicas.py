@@ -0,0 +1,146 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    Client, override_settings, RequestFactory, TestCase, TransactionTestCase
+)
+from django.urls import resolve, reverse
+
+from core.replicas import PIN_COOKIE, ReplicaMiddleware, ReplicaRouter
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def route(self, method, url, cookies=None, write=False, model=Post):
+        """Прогоняет запрос через middleware и запоминает, куда ушло бы
+        чтение модели внутри представления."""
+        databases = {}
+
+        def view(request, *args, **kwargs):
+            databases['read'] = self.router.db_for_read(model)
+            if write:
+                databases['write'] = self.router.db_for_write(model)
+            return HttpResponse()
+
+        request = getattr(self.factory, method)(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(url)
+        middleware = ReplicaMiddleware(
+            lambda request: middleware.process_view(
+                request, view, (), {}
+            ) or view(request)
+        )
+        response = middleware(request)
+        return databases, response
+
+    def test_feed_reads_go_to_replica(self):
+        """GET лент и поста читает с реплики."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:profile', kwargs={'username': 'user'}),
+            reverse('posts:post_detail', kwargs={'post_id': 1}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                databases, _ = self.route('get', url)
+                self.assertEqual(databases['read'], 'replica')
+
+    def test_other_requests_read_primary(self):
+        for method, url in (
+            ('post', reverse('posts:index')),
+            ('get', reverse('posts:post_create')),
+            ('get', reverse('posts:search')),
+        ):
+            with self.subTest(method=method, url=url):
+                databases, _ = self.route(method, url)
+                self.assertIsNone(databases['read'])
+        # Вне запроса (команды, фоновые очереди) реплики не используются
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_writer_is_pinned_to_primary(self):
+        """После записи пользователь на время читает с default."""
+        databases, response = self.route(
+            'post',
+            reverse('posts:post_create'),
+            write=True
+        )
+        self.assertEqual(databases['write'], 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        databases, response = self.route(
+            'get',
+            reverse('posts:index'),
+            cookies={PIN_COOKIE: response.cookies[PIN_COOKIE].value}
+        )
+        self.assertIsNone(databases['read'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_sessions_stay_on_primary(self):
+        databases, _ = self.route(
+            'get',
+            reverse('posts:index'),
+            model=Session
+        )
+        self.assertIsNone(databases['read'])
+
+
+@override_settings(
+    DATABASE_REPLICAS=['lagging'],
+    CACHES={
+        **settings.CACHES,
+        'feed_versions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'feed_versions',
+        },
+    }
+)
+class LaggingReplicaTests(TransactionTestCase):
+    # sync_replicas копирует базу онлайн-бэкапом, а его не сделать
+    # из открытой транзакции TestCase
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        Post.objects.create(author=self.user, text='old_post')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Копия default в файле, ее обновляет только sync_replicas
+        connections.databases['lagging'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+        }
+        self.addCleanup(connections.databases.pop, 'lagging')
+        self.addCleanup(lambda: connections['lagging'].close())
+        call_command('sync_replicas', stdout=StringIO())
+        self.client = Client()
+
+    def test_lagging_replica_does_not_poison_cache(self):
+        """Страница с отставшей реплики не кешируется под версией
+        default и не подтверждает свой ETag свежим читателям."""
+        Post.objects.create(author=self.user, text='new_post')
+        url = reverse('posts:index')
+        stale = self.client.get(url)
+        self.assertContains(stale, 'old_post')
+        self.assertNotContains(stale, 'new_post')
+        self.assertFalse(stale.has_header('Last-Modified'))
+        self.client.cookies[PIN_COOKIE] = '1'
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertContains(fresh, 'new_post')
+        del self.client.cookies[PIN_COOKIE]
+        call_command('sync_replicas', stdout=StringIO())
+        synced = self.client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertContains(synced, 'new_post')
+        self.assertEqual(synced['ETag'], fresh['ETag'])
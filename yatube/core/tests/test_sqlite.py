@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import override_settings, SimpleTestCase
+
+
+class SqlitePragmaTests(SimpleTestCase):
+    def connect(self, **settings_dict):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                'NAME': os.path.join(directory.name, 'db.sqlite3'),
+                **settings_dict,
+            },
+            alias='pragmas'
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={
+        'journal_mode': 'wal',
+        'busy_timeout': 1234,
+        'synchronous': 'normal',
+    })
+    def test_profile_applied_to_new_connections(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1234)
+        # synchronous=NORMAL
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_database_overrides_profile(self):
+        """PRAGMAS базы дополняют и переопределяют общий профиль."""
+        wrapper = self.connect(PRAGMAS={'busy_timeout': 10, 'query_only': 1})
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 10)
+        self.assertEqual(self.pragma(wrapper, 'query_only'), 1)
@@ -1,5 +1,10 @@
 from http import HTTPStatus
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.views.static import serve
+
+from . import metrics as request_metrics
 
 
 def page_not_found(request, exception):
@@ -29,3 +34,21 @@ def permission_denied(request, exception):
         'core/403.html',
         status=HTTPStatus.FORBIDDEN
     )
+
+
+def metrics(request):
+    """Гистограммы запросов (core.metrics) для Prometheus."""
+    if (
+        not settings.METRICS_ENABLED
+        or request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+    ):
+        raise Http404
+    return HttpResponse(
+        request_metrics.registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def sitemap(request, path):
+    """Файлы карты сайта из write_sitemaps, без запросов к базе."""
+    return serve(request, path, document_root=settings.SITEMAP_ROOT)
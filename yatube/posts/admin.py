@@ -1,29 +1,73 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from . import exporter, search
 from .models import Comment, Follow, Group, Post
 
 
+def export_ndjson(modeladmin, request, queryset):
+    """Отдает выбранные записи NDJSON-потоком, как export_yatube."""
+    kind = exporter.kind_for(queryset.model)
+    response = StreamingHttpResponse(
+        exporter.ndjson_lines(kind, queryset),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.ndjson"'
+    )
+    return response
+
+
+export_ndjson.short_description = 'Выгрузить выбранные в NDJSON'
+
+
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'created', 'author', 'group',)
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('created', 'author')
     empty_value_display = '-пусто-'
+    actions = (export_ndjson,)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идет через полнотекстовый индекс, а не LIKE
+        if not search_term:
+            return queryset, False
+        if not search.match_expression(search_term):
+            return queryset.none(), False
+        return queryset.filter(
+            pk__in=search.matching_ids(search_term)
+        ), False
 
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'text', 'author', 'created')
     search_fields = ('text',)
     list_filter = ('created', 'author', 'post')
+    # Выпадающий список всех комментариев был бы огромным
+    raw_id_fields = ('parent',)
     empty_value_display = '-пусто-'
+    actions = (export_ndjson,)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Путь в ветке считается при создании: перенос комментария в
+        # другой пост или ветку оставил бы устаревшие пути у поддерева
+        if obj is not None:
+            return ('post', 'parent')
+        return ()
+
+
+class GroupAdmin(admin.ModelAdmin):
+    actions = (export_ndjson,)
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
     list_filter = ('user', 'author')
+    actions = (export_ndjson,)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
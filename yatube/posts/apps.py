@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .thumbnails import drain_on_first_request
+        request_started.connect(drain_on_first_request)
@@ -0,0 +1,92 @@
+"""Условные GET для лент и страницы поста.
+
+Валидатор страницы - версии ее лент из feed_cache: их сбрасывают
+новые посты, правки, комментарии и подписки. Он считается до
+представления (одно чтение кеша и не больше одного запроса за id
+группы, автора или поста), поэтому на If-None-Match или
+If-Modified-Since ответ 304 уходит без запросов ленты и рендера.
+Страница зависит от пользователя, поэтому он входит в ETag, а
+Last-Modified отдается только гостям. Ленты RSS и Atom одинаковы для
+всех (personal=False).
+"""
+import hashlib
+
+from django.views.decorators.http import condition
+
+from . import feed_cache
+from .models import Group, Post, User
+
+
+def validators(feeds_for, personal=True):
+    """Функция запроса -> (etag, last_modified), считается раз на запрос.
+
+    Для несуществующей страницы оба валидатора None.
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_feed_validators'):
+            feeds = feeds_for(*args, **kwargs)
+            if feeds is None:
+                # Страницы нет: пусть представление ответит 404
+                request._feed_validators = (None, None)
+            else:
+                versions = feed_cache.get_versions(
+                    feed_cache.GROUPS,
+                    feed_cache.NAMES,
+                    *feeds
+                )
+                user_id = request.user.pk if personal else None
+                etag = hashlib.md5(
+                    f'{versions}:{user_id}'.encode()
+                ).hexdigest()
+                last_modified = None
+                if not personal or not request.user.is_authenticated:
+                    last_modified = feed_cache.changed_at(versions)
+                request._feed_validators = (etag, last_modified)
+        return request._feed_validators
+    return validators
+
+
+def conditional(get_validators):
+    """Декоратор condition() с валидаторами из validators()."""
+    return condition(
+        etag_func=lambda *args, **kwargs: get_validators(*args, **kwargs)[0],
+        last_modified_func=(
+            lambda *args, **kwargs: get_validators(*args, **kwargs)[1]
+        )
+    )
+
+
+def _index_feeds():
+    return (feed_cache.INDEX,)
+
+
+def _group_feeds(slug):
+    pk = Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    return None if pk is None else (feed_cache.group_feed(pk),)
+
+
+def _author_feeds(username):
+    pk = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    return None if pk is None else (feed_cache.author_feed(pk),)
+
+
+def _post_feeds(post_id, comment_id=None):
+    # Автор нужен из-за числа его постов на странице; фрагменты
+    # комментариев и ответов зависят от тех же лент
+    author_id = Post.objects.filter(
+        pk=post_id
+    ).values_list('author_id', flat=True).first()
+    if author_id is None:
+        return None
+    return (feed_cache.post_feed(post_id), feed_cache.author_feed(author_id))
+
+
+index_condition = conditional(validators(_index_feeds))
+group_condition = conditional(validators(_group_feeds))
+profile_condition = conditional(validators(_author_feeds))
+post_condition = conditional(validators(_post_feeds))
+index_syndication = validators(_index_feeds, personal=False)
+group_syndication = validators(_group_feeds, personal=False)
+author_syndication = validators(_author_feeds, personal=False)
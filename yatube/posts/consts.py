@@ -1,3 +1,4 @@
+import hashlib
 import tempfile
 
 from django.conf import settings
@@ -14,6 +15,8 @@ GROUP_SLUG = 'unique_slug'
 GROUP_TITLE = 'Тест названия группы'
 # Название тестового изображения
 IMAGE_NAME = 'small.gif'
+# Сколько комментариев показывать за раз на странице поста
+MAX_COMMENTS_DISPLAYED = 20
 # Количество отображаемых на странице постов
 MAX_POSTS_DISPLAYED = 10
 NEW_GROUP_SLUG = 'unique_slug_2'
@@ -29,6 +32,10 @@ SMALL_GIF = (
     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
     b'\x0A\x00\x3B'
 )
+# Имя, под которым тестовое изображение ляжет в хранилище (хеш содержимого)
+SMALL_GIF_STORED_NAME = (
+    f'posts/{hashlib.sha256(SMALL_GIF).hexdigest()}.gif'
+)
 # Количество символов возвращаемое при обращении к стоковому методу класса
 SYMBOLS_LIMIT_FOR_STR_METHOD = 15
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -0,0 +1,133 @@
+"""Потоковая выгрузка данных в NDJSON или CSV.
+
+Строки каждой таблицы читаются пачками по ключу (pk > последнего
+выгруженного), а внутри пачки - через iterator(), поэтому память не
+растет с размером таблицы, а долгая выгрузка не держит один огромный
+курсор. Формат записей тот же, что читает import_posts: ссылки - по
+username, slug группы, id поста и id родительского комментария.
+"""
+import csv
+import gzip
+import json
+import os
+
+from .models import Comment, Follow, Group, Post, User
+
+
+BATCH_SIZE = 5000
+CHUNK_SIZE = 1000
+# Вид записей: (модель, [(поле записи, путь в ORM), ...])
+SCHEMA = {
+    # Без паролей и почты: выгрузка уходит на стенды
+    'users': (User, (
+        ('username', 'username'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('date_joined', 'date_joined'),
+    )),
+    'groups': (Group, (
+        ('title', 'title'),
+        ('slug', 'slug'),
+        ('description', 'description'),
+    )),
+    'posts': (Post, (
+        ('id', 'pk'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('text', 'text'),
+        ('created', 'created'),
+        ('image', 'image'),
+    )),
+    'comments': (Comment, (
+        ('id', 'pk'),
+        ('parent', 'parent_id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+    'follows': (Follow, (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+KINDS = tuple(SCHEMA)
+
+
+def kind_for(model):
+    for kind, (schema_model, _) in SCHEMA.items():
+        if schema_model is model:
+            return kind
+    raise KeyError(model)
+
+
+def _value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def records(kind, queryset=None, batch_size=BATCH_SIZE):
+    """Записи вида kind по возрастанию pk, пачками по batch_size."""
+    model, fields = SCHEMA[kind]
+    if queryset is None:
+        queryset = model.objects.all()
+    names = [name for name, _ in fields]
+    lookups = [lookup for _, lookup in fields]
+    last = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last is not None:
+            batch = batch.filter(pk__gt=last)
+        rows = batch.values_list('pk', *lookups)[:batch_size]
+        count = 0
+        for pk, *values in rows.iterator(chunk_size=CHUNK_SIZE):
+            last = pk
+            count += 1
+            yield dict(zip(names, map(_value, values)))
+        if count < batch_size:
+            return
+
+
+def _ndjson(kind, record):
+    """Строка NDJSON с полем model, как ее читает import_posts."""
+    return json.dumps(dict(model=kind, **record), ensure_ascii=False) + '\n'
+
+
+def ndjson_lines(kind, queryset=None, batch_size=BATCH_SIZE):
+    for record in records(kind, queryset, batch_size):
+        yield _ndjson(kind, record)
+
+
+def open_output(path, compress=False):
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def write_ndjson(path, kinds, compress=False, batch_size=BATCH_SIZE):
+    """Все виды в один файл. Возвращает {вид: число записей}."""
+    counts = dict.fromkeys(kinds, 0)
+    with open_output(path, compress) as file:
+        for kind in kinds:
+            for record in records(kind, batch_size=batch_size):
+                file.write(_ndjson(kind, record))
+                counts[kind] += 1
+    return counts
+
+
+def write_csv(directory, kinds, compress=False, batch_size=BATCH_SIZE):
+    """Каждый вид в свой файл <вид>.csv. Возвращает {вид: число записей}."""
+    os.makedirs(directory, exist_ok=True)
+    counts = dict.fromkeys(kinds, 0)
+    for kind in kinds:
+        filename = f'{kind}.csv.gz' if compress else f'{kind}.csv'
+        _, fields = SCHEMA[kind]
+        path = os.path.join(directory, filename)
+        with open_output(path, compress) as file:
+            writer = csv.DictWriter(file, [name for name, _ in fields])
+            writer.writeheader()
+            for record in records(kind, batch_size=batch_size):
+                writer.writerow(record)
+                counts[kind] += 1
+    return counts
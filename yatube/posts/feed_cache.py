@@ -0,0 +1,144 @@
+"""Версии закешированных фрагментов лент.
+
+Каждой ленте (главная, группа, автор, пост) соответствует версия
+в кеше. Версия входит в ключ фрагмента `{% cache %}`, а сигналы
+моделей сбрасывают ее при изменениях, поэтому фрагменты можно
+хранить долго и не показывать устаревшие данные.
+
+Версия начинается со времени своего появления: по нему страницы лент
+отдают Last-Modified (posts.conditional).
+
+Сами фрагменты лежат в кеше процесса, а версии - в общем для всех
+процессов кеше FEED_VERSION_CACHE_ALIAS: сброс из другого воркера или
+из команды (warm_thumbnails, import_posts) меняет ключи фрагментов и
+ETag сразу везде.
+
+Запрос, читающий с реплики, снятой раньше последнего сброса его лент,
+видит данные старше версий. Тогда к версиям добавляется метка снимка
+реплики: такие фрагменты и ETag не смешиваются со свежими, а
+Last-Modified не отдается.
+"""
+import datetime
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import replicas
+
+
+INDEX = 'index'
+# Названия групп выводятся во всех лентах
+GROUPS = 'groups'
+# Имена авторов - во всех лентах и в комментариях к чужим постам
+NAMES = 'names'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def post_feed(post_id):
+    return f'post:{post_id}'
+
+
+def _version_key(feed):
+    return f'feed_version:{feed}'
+
+
+def _cache():
+    return caches[settings.FEED_VERSION_CACHE_ALIAS]
+
+
+def _new_version():
+    # Время в микросекундах и случайный хвост
+    return f'{time.time_ns() // 1000:x}-{uuid.uuid4().hex[:16]}'
+
+
+def _changed_stamp(versions):
+    """Время последнего сброса версий в микросекундах или None."""
+    stamps = []
+    for version in versions.split(':'):
+        if '@' in version:
+            # Метка отставшей реплики: ее данные старше версий
+            return None
+        stamp, separator, _ = version.partition('-')
+        if not separator:
+            # Версия в старом формате, без времени
+            return None
+        stamps.append(int(stamp, 16))
+    return max(stamps)
+
+
+def changed_at(versions):
+    """Время последнего сброса версий из get_versions(), UTC."""
+    stamp = _changed_stamp(versions)
+    if stamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(
+        stamp / 10 ** 6,
+        datetime.timezone.utc
+    )
+
+
+def get_versions(*feeds):
+    """Возвращает общую версию для набора лент."""
+    keys = [_version_key(feed) for feed in feeds]
+    versions = _cache().get_many(keys)
+    missing = {
+        key: _new_version() for key in keys if key not in versions
+    }
+    if missing:
+        _cache().set_many(missing, None)
+        versions.update(missing)
+    versions = ':'.join(versions[key] for key in keys)
+    return versions + _replica_marker(versions)
+
+
+def _replica_marker(versions):
+    replica = replicas.current_replica()
+    if replica is None:
+        return ''
+    synced = replicas.synced_at(replica)
+    changed = _changed_stamp(versions)
+    if synced is not None and changed is not None and synced >= changed:
+        return ''
+    return f':{replica}@{synced}'
+
+
+def bump(*feeds):
+    """Сбрасывает версии лент, их фрагменты больше не будут найдены."""
+    _cache().delete_many([_version_key(feed) for feed in feeds])
+
+
+def bump_author(author_id):
+    """Сбрасывает ленты, в которых выводится имя автора."""
+    bump(NAMES, author_feed(author_id))
+
+
+def bump_post(post, *group_ids):
+    """Сбрасывает все ленты, в которых выводится пост."""
+    feeds = [INDEX, author_feed(post.author_id), post_feed(post.pk)]
+    feeds.extend(
+        group_feed(group_id)
+        for group_id in {post.group_id, *group_ids}
+        if group_id is not None
+    )
+    bump(*feeds)
+
+
+def page_key(request, page_obj, *feeds):
+    """Ключ фрагмента страницы ленты для тега `{% cache %}`."""
+    if getattr(page_obj, 'is_cursor', False):
+        page = f'{page_obj.previous_cursor}-{page_obj.next_cursor}'
+    else:
+        page = page_obj.number
+    return (
+        f'{get_versions(GROUPS, NAMES, *feeds)}:{page}:'
+        f'{request.user.is_authenticated}'
+    )
@@ -0,0 +1,143 @@
+"""Ленты RSS и Atom: весь сайт, группа, автор.
+
+Лента строится из последних ITEMS постов тем же индексированным
+запросом, что и HTML-ленты (Post.objects.for_feed()). Готовый XML
+кешируется по версии ленты из feed_cache, а ETag и Last-Modified
+считаются из той же версии (posts.conditional), поэтому опрос без
+новых постов стоит одного чтения кеша и ответа 304.
+"""
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from .conditional import (
+    author_syndication, conditional, group_syndication, index_syndication
+)
+from .models import Group, Post, User
+
+
+ITEMS = 20
+TITLE_CHARS = 60
+# Версия ленты меняется вместе с постами, время жизни - про запас
+CACHE_SECONDS = 60 * 60
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: новые записи'
+    description = 'Последние записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.for_feed()[:ITEMS]
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(TITLE_CHARS)
+
+    def item_description(self, post):
+        return linebreaks(post.text, autoescape=True)
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.created
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('posts:profile', args=(post.author.username,))
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group else ()
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return Group.objects.get(slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return group.group_name.for_feed()[:ITEMS]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return User.objects.get(username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи автора {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        return author.posts.for_feed()[:ITEMS]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupPostsFeed.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorPostsFeed.description
+
+
+def cached(get_validators):
+    """Кеширует XML ленты по ее версии и отвечает на условные GET."""
+    def decorator(feed):
+        def view(request, *args, **kwargs):
+            etag, _ = get_validators(request, *args, **kwargs)
+            if etag is None:
+                # Группы или автора нет: лента ответит 404
+                return feed(request, *args, **kwargs)
+            # Ссылки в ленте абсолютные, поэтому ключ зависит от хоста
+            key = f'syndication:{request.get_host()}{request.path}:{etag}'
+            cached_feed = cache.get(key)
+            if cached_feed is not None:
+                content, content_type = cached_feed
+                return HttpResponse(content, content_type=content_type)
+            response = feed(request, *args, **kwargs)
+            # Feed ставит дату последнего поста, а валидатор - время
+            # версии ленты: If-Modified-Since должен сравниваться с ним
+            del response['Last-Modified']
+            cache.set(
+                key,
+                (response.content, response['Content-Type']),
+                CACHE_SECONDS
+            )
+            return response
+        return conditional(get_validators)(view)
+    return decorator
+
+
+index_rss = cached(index_syndication)(LatestPostsFeed())
+index_atom = cached(index_syndication)(LatestPostsAtomFeed())
+group_rss = cached(group_syndication)(GroupPostsFeed())
+group_atom = cached(group_syndication)(GroupPostsAtomFeed())
+profile_rss = cached(author_syndication)(AuthorPostsFeed())
+profile_atom = cached(author_syndication)(AuthorPostsAtomFeed())
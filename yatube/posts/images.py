@@ -0,0 +1,101 @@
+"""Учет ссылок на файлы картинок постов и сборка мусора.
+
+Картинки хранятся по хешу содержимого (posts.storage), поэтому один
+файл может принадлежать нескольким постам. StoredImage считает, сколько
+постов ссылается на файл; сигналы постов меняют счетчик в транзакции
+записи. Когда ссылок не осталось, файл удаляется вместе со всеми
+миниатюрами и вариантами после коммита.
+"""
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, F
+from sorl.thumbnail import delete
+
+from .models import Post, StoredImage
+
+
+logger = logging.getLogger(__name__)
+
+
+def _image_file(name):
+    field = Post._meta.get_field('image')
+    return field.attr_class(None, field, name)
+
+
+def acquire(name):
+    """Пост стал ссылаться на файл name."""
+    if not name:
+        return
+    _, created = StoredImage.objects.get_or_create(
+        name=name,
+        defaults=dict(references=1)
+    )
+    if not created:
+        StoredImage.objects.filter(name=name).update(
+            references=F('references') + 1
+        )
+
+
+def release(name):
+    """Пост перестал ссылаться на файл name."""
+    if not name:
+        return
+    StoredImage.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+    deleted, _ = StoredImage.objects.filter(
+        name=name,
+        references=0
+    ).delete()
+    if deleted:
+        transaction.on_commit(partial(collect, name))
+
+
+def collect(name):
+    """Удаляет файл, миниатюры и варианты, если на файл никто не ссылается."""
+    # Файл могли загрузить снова, пока шла транзакция
+    if (
+        StoredImage.objects.filter(name=name).exists()
+        or Post.objects.filter(image=name).exists()
+    ):
+        return False
+    try:
+        delete(_image_file(name))
+    except Exception:
+        logger.exception('Не удалось удалить картинку %s', name)
+        return False
+    return True
+
+
+def recount_all():
+    """Пересчитывает ссылки по постам. Возвращает число файлов."""
+    references = (
+        Post.objects.exclude(image='').order_by().values('image').annotate(
+            count=Count('pk')
+        ).values_list('image', 'count')
+    )
+    with transaction.atomic():
+        StoredImage.objects.all().delete()
+        created = StoredImage.objects.bulk_create(
+            (
+                StoredImage(name=name, references=count)
+                for name, count in references
+            ),
+            batch_size=500
+        )
+    return len(created)
+
+
+def orphans():
+    """Файлы в папке картинок постов, на которые не ссылается ни один пост."""
+    field = Post._meta.get_field('image')
+    storage = field.storage
+    directory = field.upload_to
+    if not storage.exists(directory):
+        return []
+    _, files = storage.listdir(directory)
+    names = {f'{directory}{filename}' for filename in files}
+    referenced = set(StoredImage.objects.values_list('name', flat=True))
+    return sorted(names - referenced)
@@ -0,0 +1,300 @@
+"""Массовая загрузка пользователей, групп, постов, комментариев и подписок.
+
+Записи читаются потоком из NDJSON (строка - JSON-объект) или CSV, в
+том числе сжатых gzip (.ndjson.gz, .csv.gz), и копятся пачками, каждая
+пачка вставляется одним bulk_create (посты и комментарии - такой же
+вставкой с датами из записей) в своей транзакции. Вставка пачками не
+шлет сигналы моделей, поэтому производные данные - счетчики, ленты
+подписок, ссылки на картинки, пути веток комментариев -
+пересчитываются один раз в finish(). Поисковый индекс обновляют
+триггеры базы, как и при записи постов сайтом во время загрузки.
+
+Ссылки между записями - по естественным ключам: автор - username,
+группа - slug, пост комментария - id поста, родитель ответа - id
+комментария (у загружаемых постов и комментариев id можно задать
+явно, иначе он выдается подряд). Родитель загружается раньше ответа -
+в выгрузке export_yatube так и есть.
+"""
+import csv
+import gzip
+import json
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feed_cache, images, stats, threads, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+BATCH_SIZE = 5000
+# Столько значений в одном IN (...): у SQLite лимит 999 параметров
+LOOKUP_CHUNK = 500
+KINDS = ('users', 'groups', 'posts', 'comments', 'follows')
+# Перед пачкой постов нужно вставить всех накопленных авторов и т.д.
+DEPENDENCIES = {
+    'users': (),
+    'groups': (),
+    'posts': ('users', 'groups'),
+    'comments': ('users', 'posts'),
+    'follows': ('users',),
+}
+
+
+class BadRecord(ValueError):
+    pass
+
+
+def kind_of(name):
+    """Вид записей по имени: posts.ndjson, post.csv -> 'posts'."""
+    stem = Path(name).name.split('.')[0].lower()
+    for kind in KINDS:
+        if stem in (kind, kind[:-1]):
+            return kind
+    return None
+
+
+def read(path):
+    """Записи файла: [(вид, запись), ...] лениво, без загрузки в память.
+
+    Вид берется из поля "model" записи, а если его нет - из имени файла.
+    """
+    default = kind_of(path)
+    suffixes = Path(path).suffixes
+    opener = gzip.open if '.gz' in suffixes else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as file:
+        if '.csv' in suffixes:
+            records = csv.DictReader(file)
+        else:
+            records = (json.loads(line) for line in file if line.strip())
+        for number, record in enumerate(records, 1):
+            kind = kind_of(record.pop('model', None) or '') or default
+            if kind is None:
+                raise BadRecord(
+                    f'{path}:{number}: неизвестен вид записи, укажите '
+                    f'"model" или назовите файл по виду ({", ".join(KINDS)})'
+                )
+            yield kind, record
+
+
+def _created(value):
+    if not value:
+        return timezone.now()
+    created = parse_datetime(value)
+    if created is None:
+        raise BadRecord(f'Неверная дата: {value}')
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+def _chunks(values, size=LOOKUP_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _insert(model, objects):
+    """bulk_create, который не заменяет created текущим временем.
+
+    Значения полей вставляются как есть, без pre_save - так же, как их
+    вставляет loaddata. auto_now_add при этом не выключается: посты и
+    комментарии, которые сайт пишет во время загрузки, получают свою
+    дату.
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key or objects[0].pk is not None
+    ]
+    batch_size = connection.ops.bulk_batch_size(fields, objects)
+    for chunk in _chunks(objects, batch_size):
+        model._base_manager._insert(chunk, fields=fields, raw=True)
+
+
+class Importer:
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = {kind: [] for kind in KINDS}
+        self.counts = dict.fromkeys(KINDS, 0)
+        self.users = {}
+        self.groups = {}
+        self.next_ids = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+
+    def add(self, kind, record):
+        self.pending[kind].append(record)
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, kind):
+        for dependency in DEPENDENCIES[kind]:
+            self.flush(dependency)
+        records, self.pending[kind] = self.pending[kind], []
+        if not records:
+            return
+        with transaction.atomic():
+            getattr(self, f'_create_{kind}')(records)
+        self.counts[kind] += len(records)
+
+    def finish(self):
+        """Досылает пачки и пересчитывает производные данные."""
+        for kind in KINDS:
+            self.flush(kind)
+        threads.fill_paths()
+        stats.recount_all()
+        timeline.rebuild()
+        images.recount_all()
+        feed_cache.bump(
+            feed_cache.INDEX,
+            feed_cache.GROUPS,
+            *(feed_cache.author_feed(pk) for pk in self.users.values()),
+            *(feed_cache.group_feed(pk) for pk in self.groups.values())
+        )
+
+    def _resolve(self, cache, queryset, field, keys):
+        """Дополняет cache {ключ: pk} ключами из keys."""
+        missing = {key for key in keys if key and key not in cache}
+        for chunk in _chunks(missing):
+            cache.update(
+                queryset.filter(**{f'{field}__in': chunk}).values_list(
+                    field,
+                    'pk'
+                )
+            )
+        unknown = missing - cache.keys()
+        if unknown:
+            raise BadRecord(
+                f'Не найдены {field}: {", ".join(sorted(unknown)[:5])}'
+            )
+
+    def _create_users(self, records):
+        User.objects.bulk_create(
+            (
+                User(
+                    username=record['username'],
+                    first_name=record.get('first_name') or '',
+                    last_name=record.get('last_name') or '',
+                    email=record.get('email') or '',
+                    # Только готовый хеш: хешировать миллионы паролей
+                    # при загрузке слишком долго
+                    password=record.get('password') or make_password(None),
+                    date_joined=_created(record.get('date_joined')),
+                )
+                for record in records
+            ),
+            ignore_conflicts=True
+        )
+        self._resolve(
+            self.users,
+            User.objects.all(),
+            'username',
+            [record['username'] for record in records]
+        )
+
+    def _create_groups(self, records):
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title=record['title'],
+                    slug=record['slug'],
+                    description=record.get('description') or '',
+                )
+                for record in records
+            ),
+            ignore_conflicts=True
+        )
+        self._resolve(
+            self.groups,
+            Group.objects.all(),
+            'slug',
+            [record['slug'] for record in records]
+        )
+
+    def _id(self, model, record):
+        if model not in self.next_ids:
+            self.next_ids[model] = (
+                model.objects.aggregate(last=Max('pk'))['last'] or 0
+            ) + 1
+        pk = int(record.get('id') or self.next_ids[model])
+        self.next_ids[model] = max(self.next_ids[model], pk + 1)
+        return pk
+
+    def _create_posts(self, records):
+        self._resolve(
+            self.users,
+            User.objects.all(),
+            'username',
+            [record['author'] for record in records]
+        )
+        self._resolve(
+            self.groups,
+            Group.objects.all(),
+            'slug',
+            [record.get('group') for record in records]
+        )
+        _insert(Post, (
+            Post(
+                pk=self._id(Post, record),
+                author_id=self.users[record['author']],
+                group_id=self.groups.get(record.get('group')),
+                text=record['text'],
+                created=_created(record.get('created')),
+                # Уже сохраненный файл, миниатюры нарежет warm_thumbnails
+                image=record.get('image') or '',
+            )
+            for record in records
+        ))
+
+    def _create_comments(self, records):
+        self._resolve(
+            self.users,
+            User.objects.all(),
+            'username',
+            [record['author'] for record in records]
+        )
+        _insert(Comment, (
+            Comment(
+                pk=self._id(Comment, record),
+                parent_id=int(record.get('parent') or 0) or None,
+                post_id=int(record['post']),
+                author_id=self.users[record['author']],
+                text=record['text'],
+                created=_created(record.get('created')),
+            )
+            for record in records
+        ))
+
+    def _create_follows(self, records):
+        self._resolve(
+            self.users,
+            User.objects.all(),
+            'username',
+            [
+                username
+                for record in records
+                for username in (record['user'], record['author'])
+            ]
+        )
+        Follow.objects.bulk_create(
+            (
+                Follow(
+                    user_id=self.users[record['user']],
+                    author_id=self.users[record['author']],
+                )
+                for record in records
+                if record['user'] != record['author']
+            ),
+            ignore_conflicts=True
+        )
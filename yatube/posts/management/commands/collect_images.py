@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts import images
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ссылки на картинки постов и удаляет файлы, '
+        'на которые не ссылается ни один пост'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены'
+        )
+
+    def handle(self, *args, **options):
+        stored = images.recount_all()
+        orphans = images.orphans()
+        deleted = 0
+        for name in orphans:
+            self.stdout.write(name)
+            if not options['dry_run']:
+                deleted += images.collect(name)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Картинок у постов: {stored}, без постов: {len(orphans)}, '
+                f'удалено: {deleted}'
+            )
+        )
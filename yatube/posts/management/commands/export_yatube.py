@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import exporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON или CSV, не загружая таблицы в память'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Файл NDJSON или папка для файлов CSV'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать вывод gzip'
+        )
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=exporter.KINDS,
+            default=exporter.KINDS,
+            help='Что выгружать'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=exporter.BATCH_SIZE,
+            help='Сколько строк читать одним запросом по ключу'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        write = (
+            exporter.write_csv if options['format'] == 'csv'
+            else exporter.write_ndjson
+        )
+        # Порядок видов важен для import_posts: авторы раньше постов
+        kinds = [kind for kind in exporter.KINDS if kind in options['models']]
+        counts = write(
+            options['output'],
+            kinds,
+            compress=options['gzip'],
+            batch_size=options['batch_size']
+        )
+        summary = ', '.join(
+            f'{kind}: {count}' for kind, count in counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Выгружено {summary} за '
+                f'{time.perf_counter() - started:.1f} c'
+            )
+        )
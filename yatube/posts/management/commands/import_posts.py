@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей, группы, посты, комментарии и подписки '
+        'из NDJSON или CSV пачками bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='+',
+            help=(
+                'Файлы .ndjson/.jsonl/.csv. Вид записей - поле "model" '
+                'или имя файла: users, groups, posts, comments, follows'
+            )
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=importer.BATCH_SIZE,
+            help='Сколько записей вставлять в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with importer.Importer(options['batch_size']) as loader:
+                for path in options['files']:
+                    for kind, record in importer.read(path):
+                        loader.add(kind, record)
+                    self.stdout.write(f'{path} прочитан')
+        except (importer.BadRecord, IntegrityError, KeyError) as error:
+            raise CommandError(f'Загрузка остановлена: {error!r}')
+        counts = ', '.join(
+            f'{kind}: {count}' for kind, count in loader.counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Загружено {counts} '
+                f'за {time.perf_counter() - started:.1f} c. Картинки '
+                f'новых постов нарежет python manage.py warm_thumbnails'
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Восстанавливает триггеры полнотекстового индекса постов '
+        'и перестраивает индекс'
+    )
+
+    def handle(self, *args, **options):
+        search.install()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
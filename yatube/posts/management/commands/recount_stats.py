@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики авторов, групп и постов по данным в базе'
+
+    def handle(self, *args, **options):
+        authors, groups, posts = stats.recount_all()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Пересчитано авторов: {authors}, групп: {groups}, '
+                f'постов: {posts}'
+            )
+        )
@@ -0,0 +1,119 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def render_in_process(rows, force=False):
+    try:
+        return thumbnails.render_batch(rows, force)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Нарезает миниатюры картинок постов на всех ядрах процессора'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать миниатюры и у постов, где они уже есть'
+        )
+        parser.add_argument(
+            '--watch',
+            type=float,
+            metavar='SECONDS',
+            help=(
+                'Не завершаться, а разбирать очередь заданий, '
+                'проверяя ее раз в SECONDS секунд'
+            )
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Сколько процессов нарезают миниатюры'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Сколько картинок отдавать процессу за раз'
+        )
+
+    def batches(self, posts, size):
+        batch = []
+        for row in posts.values_list('pk', 'image').iterator():
+            batch.append(row)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def render(self, batches, force):
+        """Нарезает пакеты и сохраняет результат. Возвращает (ок, ошибок)."""
+        executor = None
+        if self.workers > 1:
+            # Дочерние процессы не должны унаследовать открытое соединение
+            connections.close_all()
+            executor = ProcessPoolExecutor(self.workers)
+            results = executor.map(
+                partial(render_in_process, force=force),
+                batches
+            )
+        else:
+            results = (
+                thumbnails.render_batch(batch, force) for batch in batches
+            )
+        done = failed = 0
+        try:
+            for batch in results:
+                thumbnails.store(batch)
+                failed += sum(row[2] is None for row in batch)
+                done += len(batch)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return done - failed, failed
+
+    def watch(self, interval, batch_size):
+        while True:
+            rows = thumbnails.pending(batch_size * self.workers)
+            if not rows:
+                time.sleep(interval)
+                continue
+            batches = [
+                rows[i:i + batch_size]
+                for i in range(0, len(rows), batch_size)
+            ]
+            done, failed = self.render(batches, force=False)
+            self.stdout.write(
+                f'Миниатюр нарезано: {done}, с ошибкой: {failed}'
+            )
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        if options['watch'] is not None:
+            self.watch(options['watch'], options['batch_size'])
+            return
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(Q(thumbnail='') | Q(image_variants=''))
+        done, failed = self.render(
+            list(self.batches(posts, options['batch_size'])),
+            force=options['all']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Миниатюр нарезано: {done}, с ошибкой: {failed}'
+            )
+        )
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет карту сайта (посты, группы, профили) в SITEMAP_ROOT: '
+        'индекс sitemap.xml и шарды по 50 000 адресов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=settings.SITEMAP_ROOT,
+            help='Папка для файлов карты'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=settings.SITE_URL,
+            help='Адрес сайта для ссылок карты'
+        )
+        parser.add_argument(
+            '--shard-size',
+            type=int,
+            default=sitemaps.SHARD_SIZE,
+            help='Адресов в одном файле'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=sitemaps.BATCH_SIZE,
+            help='Сколько строк читать одним запросом по ключу'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = sitemaps.write(
+            options['output'],
+            options['base_url'],
+            shard_size=options['shard_size'],
+            batch_size=options['batch_size']
+        )
+        summary = ', '.join(
+            f'{section}: {count}' for section, count in counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Карта сайта: {summary} за '
+                f'{time.perf_counter() - started:.1f} c'
+            )
+        )
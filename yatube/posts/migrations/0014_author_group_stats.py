@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-17 22:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Group = apps.get_model('posts', 'Group')
+    AuthorStats.objects.bulk_create(
+        AuthorStats(
+            author_id=user.pk,
+            posts_count=user.posts_count,
+            comments_count=user.comments_count,
+            followers_count=user.followers_count,
+            following_count=user.following_count,
+        )
+        for user in User.objects.annotate(
+            posts_count=Count('posts', distinct=True),
+            comments_count=Count('comments', distinct=True),
+            followers_count=Count('following', distinct=True),
+            following_count=Count('follower', distinct=True),
+        )
+    )
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=group.pk,
+            posts_count=group.posts_count,
+            comments_count=group.comments_count,
+        )
+        for group in Group.objects.annotate(
+            posts_count=Count('group_name', distinct=True),
+            comments_count=Count('group_name__comments', distinct=True),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0013_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-17 22:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='', verbose_name='Миниатюра'),
+        ),
+        migrations.CreateModel(
+            name='ThumbnailJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('image', models.CharField(max_length=100, verbose_name='Картинка')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Взято в работу')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thumbnail_jobs', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'ordering': ('created',),
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-17 22:14
+
+from django.db import migrations, models
+from django.db.models import Count
+import posts.storage
+
+
+def fill_stored_images(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    StoredImage = apps.get_model('posts', 'StoredImage')
+    StoredImage.objects.bulk_create(
+        StoredImage(name=name, references=count)
+        for name, count in Post.objects.exclude(
+            image=''
+        ).order_by().values('image').annotate(
+            count=Count('pk')
+        ).values_list('image', 'count')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.ContentHashStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['image'], name='post_image_idx'),
+        ),
+        migrations.RunPython(fill_stored_images, migrations.RunPython.noop),
+    ]
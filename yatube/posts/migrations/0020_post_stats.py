@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-17 22:48
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostStats = apps.get_model('posts', 'PostStats')
+    PostStats.objects.bulk_create(
+        PostStats(post_id=pk, comments_count=comments_count)
+        for pk, comments_count in Post.objects.order_by().annotate(
+            comments_count=Count('comments')
+        ).values_list('pk', 'comments_count').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
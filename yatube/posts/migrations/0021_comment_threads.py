@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-17 22:51
+
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, LPad
+import django.db.models.deletion
+
+
+def fill_paths(apps, schema_editor):
+    # Все прежние комментарии - корни своих веток
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.update(
+        path=LPad(Cast('id', CharField()), 10, Value('0'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def enqueue_thumbnails(apps, schema_editor):
+    # Картинки постов, загруженных до очереди миниатюр
+    Post = apps.get_model('posts', 'Post')
+    ThumbnailJob = apps.get_model('posts', 'ThumbnailJob')
+    ThumbnailJob.objects.bulk_create(
+        ThumbnailJob(post_id=pk, image=image)
+        for pk, image in Post.objects.exclude(image='').filter(
+            Q(thumbnail='') | Q(image_variants='')
+        ).exclude(
+            pk__in=ThumbnailJob.objects.values('post_id')
+        ).values_list('pk', 'image').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_comment_threads'),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_thumbnails, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,44 @@
+import json
+
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import F, Q
 
 from core.models import CreatedModel
 from .consts import SYMBOLS_LIMIT_FOR_STR_METHOD
+from .storage import ContentHashStorage
 
 
 User = get_user_model()
 
+# Поля поста, автора и группы, которые читает шаблон ленты
+FEED_FIELDS = (
+    'id',
+    'text',
+    'created',
+    'image',
+    'thumbnail',
+    'image_variants',
+    'author__id',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__id',
+    'group__slug',
+    'group__title',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор и группа подтягиваются тем же запросом.
+
+        Выбираются только поля, которые читает шаблон ленты, поэтому
+        страница обходится фиксированным числом запросов.
+        """
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
 
 class Post(CreatedModel):
     text = models.TextField(
@@ -29,18 +60,70 @@ class Post(CreatedModel):
         null=True,
         help_text='Группа, к которой будет относиться пост'
     )
+    # Одинаковые файлы хранятся один раз (posts.images)
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentHashStorage(),
         blank=True
     )
+    # Заполняется фоновой очередью (posts.thumbnails) после загрузки
+    thumbnail = models.ImageField(
+        'Миниатюра',
+        blank=True,
+        editable=False
+    )
+    # JSON [[mime, ширина, имя], ...], заполняется вместе с миниатюрой
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created',)
+        # Индексы под ленты: главная, автор, группа
+        indexes = (
+            models.Index(
+                fields=['-created', 'id'],
+                name='post_created_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-created'],
+                name='post_author_created_idx',
+            ),
+            models.Index(
+                fields=['group', '-created'],
+                name='post_group_created_idx',
+            ),
+            # Поиск постов с тем же файлом картинки (posts.images)
+            models.Index(
+                fields=['image'],
+                name='post_image_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:SYMBOLS_LIMIT_FOR_STR_METHOD]
 
+    @property
+    def image_sources(self):
+        """Варианты картинки для <source>: [{'type': ..., 'srcset': ...}]."""
+        if not self.image_variants:
+            return []
+        storage = self.thumbnail.storage
+        srcsets = {}
+        for mime, width, name in json.loads(self.image_variants):
+            srcsets.setdefault(mime, []).append(
+                f'{storage.url(name)} {width}w'
+            )
+        return [
+            dict(type=mime, srcset=', '.join(srcset))
+            for mime, srcset in srcsets.items()
+        ]
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -84,13 +167,62 @@ class Comment(CreatedModel):
         verbose_name='Текст комментария',
         help_text='Введите текст комментария'
     )
+    # Ветка ответов (posts.threads): path - id предков и самого
+    # комментария по PATH_SEGMENT цифр, поддерево - диапазон path
+    parent = models.ForeignKey(
+        'self',
+        verbose_name='Ответ на',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Глубина',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=['post', '-created'],
+                name='comment_post_created_idx',
+            ),
+            models.Index(
+                fields=['post', 'path'],
+                name='comment_post_path_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:SYMBOLS_LIMIT_FOR_STR_METHOD]
 
+    def clean(self):
+        if (
+            self.parent_id is not None and self.post_id is not None
+            and self.parent.post_id != self.post_id
+        ):
+            raise ValidationError(
+                {'parent': 'Можно ответить только на комментарий этого поста'}
+            )
+
+    def save(self, *args, **kwargs):
+        # Путь и глубина пишутся только при создании (posts.threads),
+        # поэтому и ограничение глубины - тоже при создании, откуда бы
+        # ни пришел комментарий
+        if self._state.adding:
+            from . import threads
+            self.parent = threads.reply_parent(self.parent)
+        super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     # все пользователи, кто подписан User.follower.all()
@@ -117,3 +249,145 @@ class Follow(models.Model):
                 name='unique_pair',
             )
         )
+        # unique_pair начинается с author, а подписки пользователя
+        # ищутся по user
+        indexes = (
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx',
+            ),
+        )
+
+
+class TimelineEntryQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Записи ленты вместе с постами, их авторами и группами."""
+        return self.select_related('post__author', 'post__group').only(
+            'id',
+            'user',
+            'created',
+            *(f'post__{field}' for field in FEED_FIELDS)
+        )
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок.
+
+    На каждого подписчика автора заводится запись о посте, поэтому
+    страница подписок читается одним диапазоном по индексу
+    (user, -created) без соединения с Follow.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    # Копия Post.created, чтобы сортировать без обращения к таблице постов
+    created = models.DateTimeField('Дата создания поста')
+
+    objects = TimelineEntryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-created',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=['user', '-created'],
+                name='timeline_user_created_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} <- {self.post}'
+
+
+class AuthorStats(models.Model):
+    """Счетчики пользователя, чтобы не считать их при каждом просмотре."""
+    author = models.OneToOneField(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    def __str__(self):
+        return str(self.author)
+
+
+class GroupStats(models.Model):
+    """Счетчики группы: посты группы и комментарии к ним."""
+    group = models.OneToOneField(
+        Group,
+        verbose_name='Группа',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    def __str__(self):
+        return str(self.group)
+
+
+class PostStats(models.Model):
+    """Счетчик комментариев поста: страница поста не считает их COUNT(*)."""
+    post = models.OneToOneField(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    def __str__(self):
+        return str(self.post)
+
+
+class ThumbnailJob(CreatedModel):
+    """Задание очереди на нарезку миниатюры картинки поста."""
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='thumbnail_jobs'
+    )
+    # Картинка на момент постановки в очередь: если пост успели
+    # отредактировать, задание устарело
+    image = models.CharField('Картинка', max_length=100)
+    started = models.DateTimeField('Взято в работу', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    error = models.TextField('Ошибка', blank=True)
+
+    class Meta:
+        ordering = ('created',)
+
+    def __str__(self):
+        return self.image
+
+
+class StoredImage(models.Model):
+    """Файл картинки в хранилище и число постов, которые на него ссылаются."""
+    name = models.CharField('Файл', max_length=100, primary_key=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,127 @@
+"""Полнотекстовый поиск по постам (SQLite FTS5).
+
+Таблица posts_post_fts индексирует Post.text и хранит только индекс:
+текст читается из posts_post (external content). Синхронность держат
+триггеры базы, поэтому индекс обновляют и bulk_create, и update().
+Пересоздание posts_post миграцией удаляет триггеры - их возвращает
+`manage.py rebuild_search_index`.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+
+TABLE = 'posts_post_fts'
+
+INSTALL_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO {TABLE} (rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO {TABLE} ({TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_update
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {TABLE} ({TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {TABLE} (rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+TRIGGERS = (f'{TABLE}_insert', f'{TABLE}_delete', f'{TABLE}_update')
+
+
+def install():
+    """Создает индекс и триггеры, если их нет, и перестраивает индекс."""
+    with connection.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """Запрос пользователя в безопасное выражение MATCH.
+
+    Каждое слово берется в кавычки (синтаксис FTS5 из запроса не
+    исполняется) и ищется по префиксу: "пост" находит и "постов".
+    Пустая строка - в запросе нет ни одного слова.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class _InSubquery(RawSQL):
+    # Лукап __in сам берет подзапрос в скобки. Со вторыми скобками
+    # RawSQL SQLite читает IN ((SELECT ...)) как скалярный подзапрос
+    # и сравнивает только с первой строкой
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def matching_ids(query):
+    """Подзапрос id постов, подходящих под запрос, для pk__in."""
+    return _InSubquery(
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+        (match_expression(query),)
+    )
+
+
+class SearchResults:
+    """Посты по запросу, самые релевантные (bm25) первыми.
+
+    Для Paginator ведет себя как последовательность: страница ключей
+    выбирается из индекса, а сами посты - одним запросом по id.
+    """
+
+    def __init__(self, query):
+        self.match = match_expression(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                (self.match,)
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        if not self.match or stop <= start:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY bm25({TABLE}) LIMIT %s OFFSET %s',
+                (self.match, stop - start, start)
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,182 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import feed_cache, images, stats, threads, thumbnails, timeline
+from .models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, PostStats, User
+)
+
+
+# Поля пользователя, которые выводятся в лентах и комментариях
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+def post_pre_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.image and not instance.image._committed:
+        # Файл сохраняется раньше обычного: его имя - хеш содержимого,
+        # и только по имени видно, сменилась ли картинка
+        instance.image.save(
+            instance.image.name,
+            instance.image.file,
+            save=False
+        )
+    # Запоминаем прежнюю группу: пост должен пропасть и из ее ленты
+    instance._previous_group_id = None
+    instance._previous_image = ''
+    if instance.pk:
+        previous = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', 'image').first()
+        if previous is not None:
+            instance._previous_group_id, instance._previous_image = previous
+    instance._image_changed = (
+        instance.image.name or ''
+    ) != instance._previous_image
+    if instance._image_changed:
+        # Миниатюры старой картинки не годятся, а для такой же картинки
+        # их могли уже нарезать у другого поста
+        ready = None
+        if instance.image:
+            ready = Post.objects.filter(
+                image=instance.image.name
+            ).exclude(thumbnail='').values_list(
+                'thumbnail',
+                'image_variants'
+            ).first()
+        instance.thumbnail, instance.image_variants = ready or ('', '')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    feed_cache.bump_post(instance, previous_group_id)
+    if getattr(instance, '_image_changed', False):
+        images.acquire(instance.image.name)
+        images.release(instance._previous_image)
+        if instance.image and not instance.thumbnail:
+            thumbnails.enqueue(instance)
+    if created:
+        with transaction.atomic():
+            PostStats.objects.get_or_create(post=instance)
+            stats.add_to_author(instance.author_id, posts_count=1)
+            stats.add_to_group(instance.group_id, posts_count=1)
+        timeline.fan_out_post(instance)
+    elif previous_group_id != instance.group_id:
+        # Пост переехал в другую группу вместе со своими комментариями
+        with transaction.atomic():
+            comments_count = instance.comments.count()
+            stats.add_to_group(
+                previous_group_id,
+                posts_count=-1,
+                comments_count=-comments_count
+            )
+            stats.add_to_group(
+                instance.group_id,
+                posts_count=1,
+                comments_count=comments_count
+            )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    feed_cache.bump_post(instance)
+    images.release(instance.image.name)
+    with transaction.atomic():
+        stats.add_to_author(instance.author_id, posts_count=-1)
+        stats.add_to_group(instance.group_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    feed_cache.bump(feed_cache.post_feed(instance.post_id))
+    if created:
+        with transaction.atomic():
+            threads.place(instance)
+            stats.add_to_post(instance.post_id, comments_count=1)
+            stats.add_to_author(instance.author_id, comments_count=1)
+            stats.add_to_group(instance.post.group_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.post_feed(instance.post_id))
+    with transaction.atomic():
+        stats.add_to_post(instance.post_id, comments_count=-1)
+        stats.add_to_author(instance.author_id, comments_count=-1)
+        # При каскадном удалении поста его строка еще не удалена
+        group_id = Post.objects.filter(
+            pk=instance.post_id
+        ).values_list('group_id', flat=True).first()
+        stats.add_to_group(group_id, comments_count=-1)
+
+
+@receiver(pre_save, sender=User)
+def user_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Вход меняет только last_login: прежние имена не нужны
+    instance._name_changed = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields).intersection(
+        NAME_FIELDS
+    ):
+        return
+    previous = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*NAME_FIELDS).first()
+    instance._name_changed = previous is not None and previous != tuple(
+        getattr(instance, field) for field in NAME_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        AuthorStats.objects.get_or_create(author=instance)
+    elif getattr(instance, '_name_changed', False):
+        feed_cache.bump_author(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump(
+            feed_cache.GROUPS,
+            feed_cache.group_feed(instance.pk)
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Кнопка подписки на странице автора
+        feed_cache.bump(feed_cache.author_feed(instance.author_id))
+        with transaction.atomic():
+            stats.add_to_author(instance.author_id, followers_count=1)
+            stats.add_to_author(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.author_feed(instance.author_id))
+    with transaction.atomic():
+        stats.add_to_author(instance.author_id, followers_count=-1)
+        stats.add_to_author(instance.user_id, following_count=-1)
+    timeline.prune(instance.user_id, instance.author_id)
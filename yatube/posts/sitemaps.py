@@ -0,0 +1,184 @@
+"""Карта сайта: посты, группы и профили авторов в статических файлах.
+
+Команда write_sitemaps пишет в SITEMAP_ROOT шарды
+sitemap-<раздел>-<номер>.xml по SHARD_SIZE адресов и индекс
+sitemap.xml со ссылками на них. Строки читаются пачками по ключу
+(pk > последнего), lastmod каждой пачки считается одним
+агрегирующим запросом по диапазону ее ключей, а XML пишется в файл
+по мере чтения, поэтому память не зависит от числа постов. Запросы
+краулеров отдаются с диска и базу не трогают.
+
+lastmod поста - время последнего комментария или самого поста,
+группы и автора - время их последнего поста. Авторы без постов и
+пустые группы в карту не попадают.
+"""
+import os
+from xml.sax.saxutils import escape
+
+from django.db.models import Max
+from django.urls import reverse
+
+from .models import Comment, Group, Post, User
+
+
+# Ограничение протокола sitemaps: 50 000 адресов в файле
+SHARD_SIZE = 50000
+BATCH_SIZE = 5000
+INDEX_NAME = 'sitemap.xml'
+SHARD_PREFIX = 'sitemap-'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _batches(queryset, fields, batch_size):
+    """Строки (pk, *fields) пачками по возрастанию pk."""
+    last = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last is not None:
+            batch = batch.filter(pk__gt=last)
+        rows = list(batch.values_list('pk', *fields)[:batch_size])
+        if rows:
+            yield rows
+            last = rows[-1][0]
+        if len(rows) < batch_size:
+            return
+
+
+def _latest(queryset, field, first, last):
+    """{значение field: последний created} для field в [first, last]."""
+    return dict(
+        queryset.filter(**{
+            f'{field}__gte': first,
+            f'{field}__lte': last,
+        }).order_by().values_list(field).annotate(Max('created'))
+    )
+
+
+def post_entries(batch_size=BATCH_SIZE):
+    """(путь, lastmod) постов с учетом комментариев."""
+    for rows in _batches(Post.objects.all(), ('created',), batch_size):
+        commented = _latest(
+            Comment.objects.all(),
+            'post_id',
+            rows[0][0],
+            rows[-1][0]
+        )
+        for pk, created in rows:
+            yield (
+                reverse('posts:post_detail', args=(pk,)),
+                max(created, commented.get(pk, created))
+            )
+
+
+def group_entries(batch_size=BATCH_SIZE):
+    for rows in _batches(Group.objects.all(), ('slug',), batch_size):
+        posted = _latest(
+            Post.objects.all(),
+            'group_id',
+            rows[0][0],
+            rows[-1][0]
+        )
+        for pk, slug in rows:
+            if pk in posted:
+                yield reverse('posts:group_list', args=(slug,)), posted[pk]
+
+
+def profile_entries(batch_size=BATCH_SIZE):
+    for rows in _batches(User.objects.all(), ('username',), batch_size):
+        posted = _latest(
+            Post.objects.all(),
+            'author_id',
+            rows[0][0],
+            rows[-1][0]
+        )
+        for pk, username in rows:
+            if pk in posted:
+                yield (
+                    reverse('posts:profile', args=(username,)),
+                    posted[pk]
+                )
+
+
+SECTIONS = (
+    ('posts', post_entries),
+    ('groups', group_entries),
+    ('profiles', profile_entries),
+)
+
+
+def _lastmod(moment):
+    return moment.replace(microsecond=0).isoformat()
+
+
+class _Shard:
+    """Файл шарда: пишется во временный и подменяет старый в close()."""
+
+    def __init__(self, directory, name):
+        self.path = os.path.join(directory, name)
+        self.name = name
+        self.file = open(f'{self.path}.tmp', 'w', encoding='utf-8')
+        self.file.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<urlset xmlns="{XMLNS}">\n'
+        )
+        self.count = 0
+        self.lastmod = None
+
+    def write(self, url, lastmod):
+        self.file.write(
+            f'<url><loc>{escape(url)}</loc>'
+            f'<lastmod>{_lastmod(lastmod)}</lastmod></url>\n'
+        )
+        self.count += 1
+        if self.lastmod is None or lastmod > self.lastmod:
+            self.lastmod = lastmod
+
+    def close(self):
+        self.file.write('</urlset>\n')
+        self.file.close()
+        os.replace(f'{self.path}.tmp', self.path)
+
+
+def write(directory, base_url, shard_size=SHARD_SIZE, batch_size=BATCH_SIZE):
+    """Пишет шарды и индекс. Возвращает {раздел: число адресов}."""
+    os.makedirs(directory, exist_ok=True)
+    base_url = base_url.rstrip('/')
+    shards = []
+    counts = {}
+    for section, entries in SECTIONS:
+        counts[section] = 0
+        shard = None
+        number = 0
+        for path, lastmod in entries(batch_size):
+            if shard is None or shard.count >= shard_size:
+                if shard is not None:
+                    shard.close()
+                number += 1
+                shard = _Shard(
+                    directory,
+                    f'{SHARD_PREFIX}{section}-{number}.xml'
+                )
+                shards.append(shard)
+            shard.write(base_url + path, lastmod)
+            counts[section] += 1
+        if shard is not None:
+            shard.close()
+    index_path = os.path.join(directory, INDEX_NAME)
+    with open(f'{index_path}.tmp', 'w', encoding='utf-8') as file:
+        file.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<sitemapindex xmlns="{XMLNS}">\n'
+        )
+        for shard in shards:
+            file.write(
+                f'<sitemap><loc>{escape(base_url)}/{shard.name}</loc>'
+                f'<lastmod>{_lastmod(shard.lastmod)}</lastmod></sitemap>\n'
+            )
+        file.write('</sitemapindex>\n')
+    os.replace(f'{index_path}.tmp', index_path)
+    # Шарды прошлого запуска, которых в новом индексе нет
+    current = {shard.name for shard in shards}
+    for name in os.listdir(directory):
+        if name.startswith(SHARD_PREFIX) and name not in current:
+            os.remove(os.path.join(directory, name))
+    return counts
@@ -0,0 +1,148 @@
+"""Денормализованные счетчики авторов, групп и постов.
+
+Строка счетчиков заводится вместе с пользователем, группой или постом и
+меняется сигналами моделей одним UPDATE ... SET n = n + 1. Все счетчики
+одной записи меняются в одной транзакции: либо все, либо ни один. Если
+строки все же нет, она считается с нуля при первом чтении, а разошедшиеся
+счетчики пересчитывает recount_stats.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, PostStats, User
+)
+
+
+def _counts(queryset, field):
+    # order_by() убирает Meta.ordering из GROUP BY
+    return dict(
+        queryset.order_by().values(field).annotate(
+            count=Count('pk')
+        ).values_list(field, 'count')
+    )
+
+
+def recount_author(author_id):
+    stats, _ = AuthorStats.objects.update_or_create(
+        author_id=author_id,
+        defaults=dict(
+            posts_count=Post.objects.filter(author_id=author_id).count(),
+            comments_count=Comment.objects.filter(
+                author_id=author_id
+            ).count(),
+            followers_count=Follow.objects.filter(
+                author_id=author_id
+            ).count(),
+            following_count=Follow.objects.filter(
+                user_id=author_id
+            ).count(),
+        )
+    )
+    return stats
+
+
+def recount_group(group_id):
+    stats, _ = GroupStats.objects.update_or_create(
+        group_id=group_id,
+        defaults=dict(
+            posts_count=Post.objects.filter(group_id=group_id).count(),
+            comments_count=Comment.objects.filter(
+                post__group_id=group_id
+            ).count(),
+        )
+    )
+    return stats
+
+
+def recount_post(post_id):
+    stats, _ = PostStats.objects.update_or_create(
+        post_id=post_id,
+        defaults=dict(
+            comments_count=Comment.objects.filter(post_id=post_id).count(),
+        )
+    )
+    return stats
+
+
+def recount_all():
+    """Пересчитывает все счетчики. Возвращает (авторов, групп, постов)."""
+    posts = _counts(Post.objects.all(), 'author_id')
+    comments = _counts(Comment.objects.all(), 'author_id')
+    followers = _counts(Follow.objects.all(), 'author_id')
+    following = _counts(Follow.objects.all(), 'user_id')
+    group_posts = _counts(Post.objects.all(), 'group_id')
+    group_comments = _counts(Comment.objects.all(), 'post__group_id')
+    post_comments = _counts(Comment.objects.all(), 'post_id')
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        authors = AuthorStats.objects.bulk_create(
+            AuthorStats(
+                author_id=pk,
+                posts_count=posts.get(pk, 0),
+                comments_count=comments.get(pk, 0),
+                followers_count=followers.get(pk, 0),
+                following_count=following.get(pk, 0),
+            )
+            for pk in User.objects.values_list('pk', flat=True).iterator()
+        )
+        GroupStats.objects.all().delete()
+        groups = GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=pk,
+                posts_count=group_posts.get(pk, 0),
+                comments_count=group_comments.get(pk, 0),
+            )
+            for pk in Group.objects.values_list('pk', flat=True).iterator()
+        )
+        PostStats.objects.all().delete()
+        posts = PostStats.objects.bulk_create(
+            PostStats(post_id=pk, comments_count=post_comments.get(pk, 0))
+            for pk in Post.objects.values_list('pk', flat=True).iterator()
+        )
+    return len(authors), len(groups), len(posts)
+
+
+def author_stats(author_id):
+    try:
+        return AuthorStats.objects.get(author_id=author_id)
+    except AuthorStats.DoesNotExist:
+        return recount_author(author_id)
+
+
+def group_stats(group_id):
+    try:
+        return GroupStats.objects.get(group_id=group_id)
+    except GroupStats.DoesNotExist:
+        return recount_group(group_id)
+
+
+def post_stats(post):
+    """Счетчики поста, загруженного с select_related('stats')."""
+    try:
+        return post.stats
+    except PostStats.DoesNotExist:
+        return recount_post(post.pk)
+
+
+def _shifts(deltas):
+    return {
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    }
+
+
+def add_to_author(author_id, **deltas):
+    AuthorStats.objects.filter(author_id=author_id).update(**_shifts(deltas))
+
+
+def add_to_group(group_id, **deltas):
+    if group_id is not None:
+        GroupStats.objects.filter(group_id=group_id).update(
+            **_shifts(deltas)
+        )
+
+
+def add_to_post(post_id, **deltas):
+    PostStats.objects.filter(post_id=post_id).update(**_shifts(deltas))
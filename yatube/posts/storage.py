@@ -0,0 +1,34 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """Хранит файлы под именем sha256 их содержимого.
+
+    Повторная загрузка того же файла (репост, правка поста с той же
+    картинкой) не пишет его заново, а возвращает имя уже лежащего.
+    """
+
+    def save(self, name, content, max_length=None):
+        if content is None:
+            return super().save(name, content, max_length)
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest.hexdigest() + extension)
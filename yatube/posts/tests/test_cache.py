@@ -1,8 +1,13 @@
-from django.test import Client, TestCase
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
 from django.urls import reverse
 
-from posts import consts
-from posts.models import Post, User
+from core.cache import FileCache
+from posts import consts, feed_cache
+from posts.models import Comment, Group, Post, User
 
 
 class PostCacheTests(TestCase):
@@ -13,6 +18,14 @@ class PostCacheTests(TestCase):
         cls.first_user = User.objects.create_user(
             username=consts.FIRST_USER_USERNAME
         )
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+
+    def setUp(self):
+        cache.clear()
 
     def test_index_page_cache(self):
         # Ожидаемый текст поста
@@ -22,34 +35,169 @@ class PostCacheTests(TestCase):
             author=self.first_user,
             text=expected_post_text
         )
-        # Проверяем что запись создана с нужным текстом
-        self.assertEqual(expected_post_text, post.text)
         # Запрашиваем ответ от главной страницы
         response = self.guest_client.get(reverse('posts:index'))
-        # Считаем количество постов,переданное в контекст
-        posts_count_with_added_post = len(response.context['page_obj'])
-        # Убеждаемся что пост добавлен в бд
-        self.assertEqual(
-            1,
-            posts_count_with_added_post,
-            'Пост не добавлен в бд для проверки кеширования'
-        )
-        # Удаляем все посты из бд
-        post.delete()
-        # Сеова запрашиваем ответ от главной страницы
+        self.assertContains(response, expected_post_text)
+        # Меняем текст в обход сигналов моделей: версия ленты
+        # не сброшена, поэтому отдается закешированный фрагмент
+        Post.objects.filter(pk=post.pk).update(text='changed_text')
         response = self.guest_client.get(reverse('posts:index'))
-        # Считаем количество постов,переданное в контекст
-        post_count_after_deletion = len(response.context['page_obj'])
-        # Убеждаемся что пост удален из бд
-        self.assertEqual(
-            0,
-            post_count_after_deletion,
-            'Пост не удален из бд для проверки кеширования'
-        )
-        # Проверяем что в новый ответ от главной страницы этот пост добавлен
-        # так как выводятся кешированные данные
-        self.assertIn(
-            post.text,
-            str(response.content),
-            'Функция кеширования не работает для постов на странице index'
+        self.assertContains(
+            response,
+            expected_post_text,
+            msg_prefix=(
+                'Функция кеширования не работает для постов '
+                'на странице index'
+            )
+        )
+
+    def test_bump_from_other_process_resets_page(self):
+        """Сброс версии другим процессом (своим объектом кеша на тех же
+        файлах, как у warm_thumbnails) виден веб-процессу."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = {
+            'BACKEND': 'core.cache.FileCache',
+            'LOCATION': directory.name,
+        }
+        post = Post.objects.create(author=self.first_user, text='old_text')
+        with override_settings(
+            CACHES={**settings.CACHES, 'feed_versions': shared}
+        ):
+            self.assertContains(
+                self.guest_client.get(reverse('posts:index')),
+                'old_text'
+            )
+            Post.objects.filter(pk=post.pk).update(text='new_text')
+            FileCache(directory.name, {}).delete(
+                feed_cache._version_key(feed_cache.INDEX)
+            )
+            self.assertContains(
+                self.guest_client.get(reverse('posts:index')),
+                'new_text'
+            )
+
+    def test_deleted_post_disappears_from_cached_pages(self):
+        """Удаление поста сразу сбрасывает кеш лент."""
+        post = Post.objects.create(
+            author=self.first_user,
+            group=self.group,
+            text='deleted_text'
+        )
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile',
+                kwargs={'username': self.first_user.username}
+            ),
+        )
+        for url in urls:
+            self.assertContains(self.guest_client.get(url), post.text)
+        post.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotContains(
+                    self.guest_client.get(url),
+                    post.text,
+                    msg_prefix='Удаленный пост остался в кеше'
+                )
+
+    def test_new_post_appears_on_cached_pages(self):
+        """Новый пост виден сразу, а не после истечения кеша."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.create(
+            author=self.first_user,
+            group=self.group,
+            text='fresh_text'
+        )
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')),
+            'fresh_text'
+        )
+
+    def test_pages_are_cached_separately(self):
+        """Каждая страница ленты кешируется под своим ключом."""
+        for i in range(consts.MAX_POSTS_DISPLAYED + 1):
+            Post.objects.create(
+                author=self.first_user,
+                text=f'post_number_{i}_'
+            )
+        first_page = self.guest_client.get(reverse('posts:index'))
+        second_page = self.guest_client.get(
+            reverse('posts:index') + '?page=2'
+        )
+        self.assertContains(first_page, 'post_number_10_')
+        self.assertNotContains(second_page, 'post_number_10_')
+        self.assertContains(second_page, 'post_number_0_')
+
+    def test_group_rename_resets_feed_cache(self):
+        """Переименование группы сбрасывает кеш лент с ее постами."""
+        Post.objects.create(
+            author=self.first_user,
+            group=self.group,
+            text=consts.POST_TEXT
+        )
+        self.guest_client.get(reverse('posts:index'))
+        self.group.title = consts.NEW_GROUP_TITLE
+        self.group.save()
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')),
+            consts.NEW_GROUP_TITLE
+        )
+
+    def test_new_comment_resets_post_comments_cache(self):
+        post = Post.objects.create(
+            author=self.first_user,
+            text=consts.POST_TEXT
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=post,
+            author=self.first_user,
+            text=consts.COMMENT_TEXT
+        )
+        self.assertContains(self.guest_client.get(url), consts.COMMENT_TEXT)
+
+    def test_author_rename_resets_cached_names(self):
+        """Новое имя автора видно в лентах, комментариях и его RSS."""
+        author = User.objects.create_user(username='old_name')
+        post = Post.objects.create(
+            author=self.first_user,
+            text=consts.POST_TEXT
+        )
+        Post.objects.create(author=author, group=self.group, text='own')
+        Comment.objects.create(
+            post=post,
+            author=author,
+            text=consts.COMMENT_TEXT
+        )
+        pages = (
+            (reverse('posts:index'), 'Новое Имя'),
+            (
+                reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+                'Новое Имя'
+            ),
+            (
+                reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+                'new_name'
+            ),
+        )
+        for url, _ in pages:
+            self.guest_client.get(url)
+        rss = self.guest_client.get(
+            reverse('posts:profile_rss', kwargs={'username': 'old_name'})
+        )
+        author.username = 'new_name'
+        author.first_name = 'Новое'
+        author.last_name = 'Имя'
+        author.save()
+        for url, name in pages:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), name)
+        response = self.guest_client.get(
+            reverse('posts:profile_rss', kwargs={'username': 'new_name'}),
+            HTTP_IF_NONE_MATCH=rss['ETag']
         )
+        self.assertContains(response, 'Новое Имя')
@@ -0,0 +1,121 @@
+import re
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts, stats
+from posts.models import Comment, Post, PostStats, User
+
+
+LOAD_MORE = re.compile(r'data-comments-url="([^"]+)"')
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.post = Post.objects.create(author=cls.user, text=consts.POST_TEXT)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                text=f'comment_number_{number}_'
+            )
+            for number in range(consts.MAX_COMMENTS_DISPLAYED + 5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_page(self):
+        """На странице поста - последние комментарии и кнопка "еще"."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        content = response.content.decode()
+        self.assertEqual(
+            response.context['comments_count'],
+            len(self.comments)
+        )
+        self.assertIn(self.comments[-1].text, content)
+        self.assertNotIn(self.comments[4].text, content)
+        self.assertEqual(len(LOAD_MORE.findall(content)), 1)
+
+    def test_load_more_fragment(self):
+        """Фрагмент по курсору продолжает список без повторов."""
+        content = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        ).content.decode()
+        url = LOAD_MORE.search(content).group(1).replace('&amp;', '&')
+        fragment = self.guest_client.get(url)
+        self.assertTemplateUsed(fragment, 'posts/includes/comments_list.html')
+        self.assertTemplateNotUsed(fragment, 'base.html')
+        self.assertEqual(
+            [comment.pk for comment in fragment.context['post_comments']],
+            [comment.pk for comment in reversed(self.comments[:5])]
+        )
+        self.assertIsNone(LOAD_MORE.search(fragment.content.decode()))
+
+    def test_junk_cursors_share_cache_entry(self):
+        """Мусорные курсоры не заводят новых фрагментов в кеше."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.guest_client.get(url)
+        cached = len(cache._cache)
+        junk_tokens = (
+            'junk',
+            'other-junk',
+            '!!!',
+            # id за пределами INTEGER SQLite
+            'MjAyMC0wMS0wMVQwMDowMDowMCswMDowMHwxMjM0NTY3ODkwMTIzNDU2Nzg5'
+            'MDEyMw',
+        )
+        for junk in junk_tokens:
+            with self.subTest(after=junk):
+                response = self.guest_client.get(url, {'after': junk})
+                self.assertContains(response, self.comments[-1].text)
+                self.assertEqual(len(cache._cache), cached)
+
+    def test_missing_post(self):
+        self.assertEqual(
+            self.guest_client.get(
+                reverse('posts:post_comments', kwargs={'post_id': 10 ** 6})
+            ).status_code,
+            404
+        )
+
+
+class PostStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.post = Post.objects.create(author=cls.user, text=consts.POST_TEXT)
+
+    def comments_count(self):
+        return PostStats.objects.get(post=self.post).comments_count
+
+    def test_counter_follows_comments(self):
+        comment = Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text=consts.COMMENT_TEXT
+        )
+        self.assertEqual(self.comments_count(), 1)
+        comment.delete()
+        self.assertEqual(self.comments_count(), 0)
+
+    def test_missing_row_is_recounted(self):
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text=consts.COMMENT_TEXT
+        )
+        PostStats.objects.all().delete()
+        post = Post.objects.select_related('stats').get(pk=self.post.pk)
+        self.assertEqual(stats.post_stats(post).comments_count, 1)
+        self.assertEqual(self.comments_count(), 1)
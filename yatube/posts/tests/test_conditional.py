@@ -0,0 +1,126 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import query_budget
+from posts import consts
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.reader = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text=consts.POST_TEXT
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': consts.GROUP_SLUG}),
+            reverse(
+                'posts:profile',
+                kwargs={'username': consts.FIRST_USER_USERNAME}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_unchanged_pages_answer_304(self):
+        """Повторный запрос без изменений - 304 без рендера и ленты."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Last-Modified', response)
+                # Только поиск id группы, автора или поста
+                with query_budget(1):
+                    repeated = self.guest_client.get(
+                        url,
+                        HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertFalse(repeated.templates)
+                self.assertEqual(
+                    self.guest_client.get(
+                        url,
+                        HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                    ).status_code,
+                    304
+                )
+
+    def test_changes_reset_validators(self):
+        """Новый пост, правка, комментарий и подписка меняют ETag."""
+        changes = (
+            (self.urls[0], lambda: Post.objects.create(
+                author=self.reader,
+                text=consts.POST_TEXT
+            )),
+            (self.urls[1], lambda: Post.objects.filter(
+                pk=self.post.pk
+            ).get().save()),
+            (self.urls[2], lambda: Follow.objects.create(
+                user=self.reader,
+                author=self.user
+            )),
+            (self.urls[3], lambda: Comment.objects.create(
+                post=self.post,
+                author=self.reader,
+                text=consts.COMMENT_TEXT
+            )),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_users_get_own_validators(self):
+        client = Client()
+        client.force_login(self.reader)
+        guest = self.guest_client.get(self.urls[0])
+        response = client.get(
+            self.urls[0],
+            HTTP_IF_NONE_MATCH=guest['ETag'],
+            HTTP_IF_MODIFIED_SINCE=guest['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_gzip(self):
+        """Сжатый ответ со слабым ETag тоже отвечает 304."""
+        response = self.guest_client.get(
+            self.urls[0],
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        repeated = self.guest_client.get(
+            self.urls[0],
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(repeated.status_code, 304)
+
+    def test_missing_pages_are_404(self):
+        for url in (
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
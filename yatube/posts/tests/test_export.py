@@ -0,0 +1,139 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.admin import helpers
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts, exporter
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.reader = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group if number % 2 else None,
+                text=f'{consts.POST_TEXT} {number}'
+            )
+            for number in range(7)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.reader,
+            text=consts.COMMENT_TEXT
+        )
+        cls.reply = Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.user,
+            parent=cls.comment,
+            text=consts.COMMENT_TEXT
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_records_are_read_in_keyset_batches(self):
+        """Пачки по ключу отдают все строки по одному разу."""
+        with self.assertNumQueries(3):
+            records = list(exporter.records('posts', batch_size=3))
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.pk for post in self.posts]
+        )
+        self.assertEqual(records[1]['group'], consts.GROUP_SLUG)
+        self.assertIsNone(records[0]['group'])
+
+    def test_export_can_be_imported(self):
+        """Выгрузка export_yatube загружается обратно import_posts."""
+        path = os.path.join(self.directory, 'dump.ndjson.gz')
+        call_command('export_yatube', path, '--gzip', stdout=StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(
+            [line['model'] for line in lines],
+            ['users'] * 2 + ['groups'] + ['posts'] * 7
+            + ['comments'] * 2 + ['follows']
+        )
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list('pk', flat=True)),
+            [post.pk for post in self.posts]
+        )
+        self.assertTrue(
+            Follow.objects.filter(
+                user__username=consts.USER_USERNAME,
+                author__username=consts.FIRST_USER_USERNAME
+            ).exists()
+        )
+        self.assertEqual(
+            list(Comment.objects.values_list(
+                'pk', 'post_id', 'parent_id', 'path', 'depth'
+            ).order_by('pk')),
+            [
+                (comment.pk, comment.post_id, comment.parent_id,
+                 comment.path, comment.depth)
+                for comment in (self.comment, self.reply)
+            ]
+        )
+
+    def test_csv_export(self):
+        call_command(
+            'export_yatube',
+            self.directory,
+            '--format', 'csv',
+            '--models', 'posts', 'groups',
+            stdout=StringIO()
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['groups.csv', 'posts.csv']
+        )
+        with open(os.path.join(self.directory, 'posts.csv')) as file:
+            self.assertEqual(len(file.readlines()), 1 + len(self.posts))
+
+    def test_admin_action_streams_selected(self):
+        admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'export_ndjson',
+                helpers.ACTION_CHECKBOX_NAME: [
+                    self.posts[0].pk,
+                    self.posts[2].pk
+                ],
+            }
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [self.posts[0].pk, self.posts[2].pk]
+        )
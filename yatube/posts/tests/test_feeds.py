@@ -0,0 +1,123 @@
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import query_budget
+from posts import consts, feeds
+from posts.models import Group, Post, User
+
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.other = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(
+                author=cls.user,
+                group=cls.group,
+                text=f'{consts.POST_TEXT} {number}'
+            )
+            for number in range(feeds.ITEMS + 5)
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other,
+            text='<b>Другой</b> пост'
+        )
+        group = {'slug': consts.GROUP_SLUG}
+        author = {'username': consts.FIRST_USER_USERNAME}
+        cls.urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', kwargs=group),
+            reverse('posts:group_atom', kwargs=group),
+            reverse('posts:profile_rss', kwargs=author),
+            reverse('posts:profile_atom', kwargs=author),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feed_items(self):
+        """Лента - последние ITEMS постов своей группы или автора."""
+        root = ElementTree.fromstring(
+            self.client.get(reverse('posts:index_rss')).content
+        )
+        items = root.findall('channel/item')
+        self.assertEqual(len(items), feeds.ITEMS)
+        self.assertTrue(items[0].find('link').text.endswith(
+            reverse('posts:post_detail', args=(self.other_post.pk,))
+        ))
+        # Текст экранирован, XSS из поста не попадает в читалку
+        self.assertIn('&lt;b&gt;', items[0].find('description').text)
+        root = ElementTree.fromstring(self.client.get(reverse(
+            'posts:group_atom',
+            kwargs={'slug': consts.GROUP_SLUG}
+        )).content)
+        entries = root.findall(f'{ATOM}entry')
+        self.assertEqual(len(entries), feeds.ITEMS)
+        self.assertEqual(
+            root.find(f'{ATOM}subtitle').text,
+            consts.GROUP_DESCRIPTION
+        )
+        self.assertEqual(
+            entries[0].find(f'{ATOM}category').get('term'),
+            consts.GROUP_TITLE
+        )
+
+    def test_missing_group_or_author(self):
+        for url in (
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_atom', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_polling_unchanged_feed(self):
+        """Повторный опрос - 304 или XML из кеша без запроса постов."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                # На каждый из трех запросов - поиск id группы или автора
+                with query_budget(3):
+                    self.assertEqual(
+                        self.client.get(
+                            url,
+                            HTTP_IF_NONE_MATCH=response['ETag']
+                        ).status_code,
+                        304
+                    )
+                    self.assertEqual(
+                        self.client.get(
+                            url,
+                            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                        ).status_code,
+                        304
+                    )
+                    cached = self.client.get(url)
+                self.assertEqual(cached.content, response.content)
+                self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_new_post_changes_feed(self):
+        response = self.client.get(self.urls[4])
+        Post.objects.create(author=self.user, text='Свежий пост')
+        fresh = self.client.get(
+            self.urls[4],
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn('Свежий пост', fresh.content.decode())
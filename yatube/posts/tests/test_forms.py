@@ -113,7 +113,7 @@ class PostCreateFormTests(TestCase):
         )
         self.assertEqual(
             post.image.name,
-            f'posts/{form_data["image"]}',
+            consts.SMALL_GIF_STORED_NAME,
             msg='Post_create неверно передает атрибут image'
         )
         # Пытался сделать цикл, image не сравнивается нормально
@@ -163,7 +163,7 @@ class PostCreateFormTests(TestCase):
         )
         self.assertEqual(
             response.context['post'].image,
-            f'posts/{form_data["image"]}',
+            consts.SMALL_GIF_STORED_NAME,
             msg='Post_edit неверно передает атрибут image'
         )
 
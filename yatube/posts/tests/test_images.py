@@ -0,0 +1,147 @@
+import os
+import shutil
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (
+    Client, override_settings, TestCase, TransactionTestCase
+)
+from django.urls import reverse
+
+from posts import consts, thumbnails
+from posts.models import Post, StoredImage, ThumbnailJob, User
+
+
+def upload(name=consts.IMAGE_NAME):
+    return SimpleUploadedFile(
+        name=name,
+        content=consts.SMALL_GIF,
+        content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=consts.TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageDeduplicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(consts.TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_same_file_is_stored_once(self):
+        """Повторная загрузка файла переиспользует его и миниатюры."""
+        first = Post.objects.create(
+            author=self.user,
+            text=consts.POST_TEXT,
+            image=upload('first.gif')
+        )
+        thumbnails.run_pending()
+        first.refresh_from_db()
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': consts.POST_TEXT, 'image': upload('repost.gif')}
+        )
+        second = Post.objects.exclude(pk=first.pk).get()
+        self.assertEqual(second.image.name, consts.SMALL_GIF_STORED_NAME)
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(
+            os.listdir(os.path.join(consts.TEMP_MEDIA_ROOT, 'posts')),
+            [os.path.basename(consts.SMALL_GIF_STORED_NAME)]
+        )
+        # Миниатюры не режутся заново
+        self.assertEqual(second.thumbnail, first.thumbnail)
+        self.assertEqual(second.image_variants, first.image_variants)
+        self.assertFalse(ThumbnailJob.objects.exists())
+        self.assertEqual(
+            StoredImage.objects.get(name=first.image.name).references,
+            2
+        )
+
+    def test_resending_same_file_keeps_post_unchanged(self):
+        """Правка с тем же файлом не сбрасывает миниатюру."""
+        post = Post.objects.create(
+            author=self.user,
+            text=consts.POST_TEXT,
+            image=upload()
+        )
+        thumbnails.run_pending()
+        post.refresh_from_db()
+        thumbnail = post.thumbnail.name
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': consts.POST_TEXT, 'image': upload('again.gif')}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail.name, thumbnail)
+        self.assertFalse(ThumbnailJob.objects.exists())
+        self.assertEqual(
+            StoredImage.objects.get(name=post.image.name).references,
+            1
+        )
+
+
+@override_settings(MEDIA_ROOT=consts.TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageGarbageCollectionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+
+    def tearDown(self):
+        shutil.rmtree(consts.TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self):
+        post = Post.objects.create(
+            author=self.user,
+            text=consts.POST_TEXT,
+            image=upload()
+        )
+        thumbnails.run_pending()
+        post.refresh_from_db()
+        return post
+
+    def test_file_is_deleted_with_last_post(self):
+        """Файл и миниатюры удаляются вместе с последним постом."""
+        first = self.create_post()
+        second = self.create_post()
+        first.delete()
+        self.assertTrue(default_storage.exists(second.image.name))
+        second.delete()
+        self.assertFalse(default_storage.exists(second.image.name))
+        self.assertFalse(default_storage.exists(second.thumbnail.name))
+        self.assertFalse(StoredImage.objects.exists())
+
+    def test_replaced_file_is_deleted(self):
+        post = self.create_post()
+        previous = post.image.name
+        post.image = ''
+        post.save()
+        self.assertFalse(default_storage.exists(previous))
+
+    def test_collect_images_command(self):
+        """collect_images чинит счетчики и удаляет файлы без постов."""
+        post = self.create_post()
+        StoredImage.objects.all().delete()
+        orphan = default_storage.save('posts/orphan.gif', upload())
+        call_command('collect_images', stdout=StringIO())
+        self.assertEqual(
+            StoredImage.objects.get(name=post.image.name).references,
+            1
+        )
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertFalse(default_storage.exists(orphan))
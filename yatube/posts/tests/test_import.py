@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import consts, importer, search
+from posts.models import (
+    AuthorStats, Comment, Follow, GroupStats, Post, TimelineEntry, User
+)
+
+
+def write(directory, name, lines):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    return path
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def load(self, *paths, batch_size=2):
+        call_command(
+            'import_posts',
+            *paths,
+            batch_size=batch_size,
+            stdout=StringIO()
+        )
+
+    def test_import_rebuilds_derived_data(self):
+        """Загрузка пачками пересчитывает счетчики, индекс и ленты."""
+        users = write(self.directory, 'users.csv', [
+            'username,first_name',
+            'leo,Лев',
+            'anna,Анна',
+            'reader,',
+        ])
+        records = write(self.directory, 'dump.ndjson', [
+            json.dumps(record, ensure_ascii=False) for record in (
+                dict(model='group', title='Кошки', slug='cats'),
+                dict(model='follow', user='reader', author='leo'),
+                dict(
+                    model='post',
+                    id=100,
+                    author='leo',
+                    group='cats',
+                    text='Котики захватили мир',
+                    created='2020-01-02T10:00:00+00:00'
+                ),
+                dict(model='post', author='anna', text='Пост без группы'),
+                dict(model='post', author='leo', text='Еще один пост'),
+                dict(model='comment', post=100, author='anna', text='Мяу'),
+            )
+        ])
+        self.load(users, records)
+
+        leo = User.objects.get(username='leo')
+        self.assertEqual(leo.first_name, 'Лев')
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.created.year, 2020)
+        self.assertEqual(Post.objects.filter(pk=101).count(), 1)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(AuthorStats.objects.get(author=leo).posts_count, 2)
+        self.assertEqual(
+            GroupStats.objects.get(group=post.group).comments_count,
+            1
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(),
+            2
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+        response = Client().get(reverse('posts:search'), {'q': 'котики'})
+        self.assertEqual(list(response.context['page_obj']), [post])
+        # Триггеры вернулись: новые посты снова попадают в индекс
+        Post.objects.create(author=leo, text=consts.POST_TEXT)
+        self.assertEqual(
+            search.SearchResults(consts.POST_TEXT).count(),
+            1
+        )
+
+    def test_unknown_author_stops_import(self):
+        posts = write(self.directory, 'posts.ndjson', [
+            json.dumps(dict(author='nobody', text='Текст поста')),
+        ])
+        with self.assertRaisesMessage(CommandError, 'nobody'):
+            self.load(posts)
+        self.assertFalse(Post.objects.exists())
+        with self.assertRaises(CommandError):
+            self.load(write(self.directory, 'dump.csv', ['a,b', '1,2']))
+
+    def test_site_writes_during_import_keep_date_and_index(self):
+        """Загрузка не меняет, как сайт сохраняет посты."""
+        author = User.objects.create_user(username='leo')
+        started = timezone.now()
+        with importer.Importer() as loader:
+            loader.add('posts', dict(
+                author='leo',
+                text='Старый пост',
+                created='2020-01-02T10:00:00+00:00'
+            ))
+            loader.flush('posts')
+            post = Post.objects.create(author=author, text=consts.POST_TEXT)
+            self.assertGreaterEqual(post.created, started)
+            self.assertEqual(
+                search.SearchResults(consts.POST_TEXT).count(),
+                1
+            )
+        self.assertEqual(
+            Post.objects.get(text='Старый пост').created.year,
+            2020
+        )
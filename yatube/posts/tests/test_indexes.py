@@ -0,0 +1,111 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import consts
+from posts.models import Comment, Follow, Group, Post, User
+
+
+# Проход по таблице целиком. Проход по индексу (SCAN ... USING
+# INDEX) - это чтение ленты в порядке индекса до LIMIT, он допустим
+FULL_SCAN = re.compile(
+    r'\bSCAN (?:TABLE )?(?!CONSTANT ROW)(?P<table>\w+)(?!.* USING )'
+)
+# Сортировка результата во временном B-дереве
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.author = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(consts.MAX_POSTS_DISPLAYED * 2):
+            cls.post = Post.objects.create(
+                author=cls.author if i % 2 else cls.user,
+                group=cls.group if i % 3 else None,
+                text=consts.POST_TEXT
+            )
+            comment = Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                text=consts.COMMENT_TEXT
+            )
+        # Ветка ответов: первые ответы читаются диапазонами path
+        for _ in range(2):
+            comment = Comment.objects.create(
+                post=cls.post,
+                author=cls.author,
+                parent=comment,
+                text=consts.COMMENT_TEXT
+            )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+            reverse('posts:follow_index'),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def query_plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def check_views(self):
+        for url in self.urls:
+            for sql, plan in self.query_plans(url):
+                with self.subTest(url=url, sql=sql):
+                    scans = [
+                        match.group('table')
+                        for match in map(FULL_SCAN.search, plan)
+                        if match
+                    ]
+                    self.assertEqual(
+                        scans,
+                        [],
+                        f'Запрос {url} читает таблицы целиком: {plan}'
+                    )
+                    # Сортировка даже выборки по индексу означает, что
+                    # для ленты нет составного индекса (поле, -created)
+                    self.assertNotIn(
+                        TEMP_SORT,
+                        plan,
+                        f'Запрос {url} сортирует во временном B-дереве: '
+                        f'{plan}'
+                    )
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы страниц читают диапазоны индексов без сортировки."""
+        self.check_views()
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_feed_queries_use_indexes(self):
+        self.check_views()
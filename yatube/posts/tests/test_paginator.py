@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts import consts
+from posts.models import Group, Post, User
+from posts.utils import decode_cursor, encode_cursor
+
+
+@override_settings(POSTS_CURSOR_PAGINATION=True)
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        cls.posts_total_count = consts.MAX_POSTS_DISPLAYED * 2 + 3
+        for i in range(cls.posts_total_count):
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'{consts.POST_TEXT} {i}'
+            )
+        # Одинаковая дата у части постов: порядок должен держаться на id
+        first_post = Post.objects.order_by('pk').first()
+        Post.objects.filter(pk__lte=first_post.pk + 5).update(
+            created=first_post.created
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url):
+        """Проходит ленту по токенам ?after= до конца."""
+        pages = []
+        response = self.guest_client.get(url)
+        while True:
+            page_obj = response.context['page_obj']
+            pages.append(list(page_obj))
+            if not page_obj.has_next():
+                return pages, page_obj
+            response = self.guest_client.get(
+                url, {'after': page_obj.next_cursor}
+            )
+
+    def test_cursor_walk_covers_all_posts_once(self):
+        """По токенам ?after= лента проходится целиком и без повторов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.user.username}
+            ),
+        )
+        expected = list(Post.objects.order_by('-created', '-pk'))
+        for url in urls:
+            with self.subTest(url=url):
+                pages, _ = self.walk(url)
+                self.assertEqual(sum(pages, []), expected)
+                for page in pages[:-1]:
+                    self.assertEqual(len(page), consts.MAX_POSTS_DISPLAYED)
+
+    def test_cursor_previous_page(self):
+        """Токен ?before= возвращает предыдущую страницу."""
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        second_page = self.guest_client.get(
+            url, {'after': first_page.next_cursor}
+        ).context['page_obj']
+        back_page = self.guest_client.get(
+            url, {'before': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+        self.assertFalse(back_page.has_previous())
+        self.assertTrue(back_page.has_next())
+
+    def test_cursor_links_rendered(self):
+        """Шаблон паджинатора выводит ссылки с токенами."""
+        response = self.guest_client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertContains(response, f'?after={page_obj.next_cursor}')
+        self.assertNotContains(response, '?page=')
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный токен отдает первую страницу, а не ошибку."""
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        tokens = (
+            '',
+            '!!!',
+            'bm90LWEtY3Vyc29y',
+            'MjAyMnwx',
+            # 2020-01-01T00:00:00|<id из 23 цифр>: наивная дата
+            'MjAyMC0wMS0wMVQwMDowMDowMHwxMjM0NTY3ODkwMTIzNDU2Nzg5MDEyMw',
+            # 2020-01-01T00:00:00+00:00|<id из 23 цифр>: id вне INTEGER
+            'MjAyMC0wMS0wMVQwMDowMDowMCswMDowMHwxMjM0NTY3ODkwMTIzNDU2Nzg5'
+            'MDEyMw',
+            # 2020-01-01T00:00:00+00:00|0
+            'MjAyMC0wMS0wMVQwMDowMDowMCswMDowMHww',
+        )
+        for token in tokens:
+            with self.subTest(token=token):
+                page_obj = self.guest_client.get(
+                    url, {'after': token}
+                ).context['page_obj']
+                self.assertEqual(list(page_obj), list(first_page))
+
+    def test_cursor_roundtrip(self):
+        post = Post.objects.first()
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)),
+            (post.created, post.pk)
+        )
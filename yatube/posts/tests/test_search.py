@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts, search
+from posts.models import Post
+
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.guest_client = Client()
+        cls.best = Post.objects.create(
+            author=cls.user,
+            text='Котики, котики и еще раз котики'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user,
+            text='Пост про собак, но один котик тут тоже есть'
+        )
+        Post.objects.create(author=cls.user, text=consts.POST_TEXT)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, page=None):
+        data = dict(q=query)
+        if page:
+            data['page'] = page
+        return self.guest_client.get(reverse('posts:search'), data)
+
+    def test_results_are_ranked(self):
+        """Поиск находит посты по префиксу слова, лучшие первыми."""
+        response = self.search('КОТИК')
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.best, self.other]
+        )
+
+    def test_query_syntax_is_not_executed(self):
+        """Синтаксис FTS5 в запросе не ломает поиск."""
+        for query in ('"', 'котик OR', 'NEAR(', '*', ''):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+        self.assertEqual(len(self.search('*').context['page_obj']), 0)
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(author=self.user, text='Редкое слово')
+        self.assertIn(post, self.search('редкое').context['page_obj'])
+        Post.objects.filter(pk=post.pk).update(text='Другой текст')
+        self.assertNotIn(post, self.search('редкое').context['page_obj'])
+        post.delete()
+        self.assertEqual(len(self.search('другой').context['page_obj']), 0)
+
+    def test_pagination_keeps_query(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Котик номер {i}')
+            for i in range(consts.MAX_POSTS_DISPLAYED)
+        )
+        response = self.search('котик')
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82%D0%B8%D0%BA')
+        response = self.search('котик', page=2)
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_triggers_survive_migrations(self):
+        """Миграции не потеряли триггеры индекса (см. rebuild_search_index)."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertTrue(set(search.TRIGGERS) <= triggers)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'),
+            dict(q='котик')
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.best, self.other}
+        )
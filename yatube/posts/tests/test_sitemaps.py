@@ -0,0 +1,132 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import StringIO
+from xml.etree import ElementTree
+
+from django.core.management import call_command
+from django.test import Client, override_settings, TestCase
+from django.utils import timezone
+
+from core.testing import query_budget
+from posts import consts, sitemaps
+from posts.models import Comment, Group, Post, User
+
+
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+BASE_URL = 'https://example.com'
+
+
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        # Без постов: в карту не попадает
+        User.objects.create_user(username=consts.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        Group.objects.create(
+            title=consts.NEW_GROUP_TITLE,
+            slug=consts.NEW_GROUP_SLUG
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'{consts.POST_TEXT} {number}'
+            )
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0],
+            author=cls.user,
+            text=consts.COMMENT_TEXT
+        )
+        cls.comment.created = timezone.now() + datetime.timedelta(days=1)
+        cls.comment.save()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def parse(self, name):
+        return ElementTree.parse(os.path.join(self.directory, name))
+
+    def urls(self, name):
+        return {
+            url.find(f'{NS}loc').text: url.find(f'{NS}lastmod').text
+            for url in self.parse(name).getroot()
+        }
+
+    def write(self, **options):
+        call_command(
+            'write_sitemaps',
+            output=self.directory,
+            base_url=BASE_URL,
+            stdout=StringIO(),
+            **options
+        )
+
+    def test_shards_and_index(self):
+        """Посты режутся на шарды, индекс ссылается на каждый."""
+        # Запрос пачки и ее lastmod: 3 пачки постов, по 2 групп и
+        # пользователей, у последних пачек lastmod не нужен
+        with query_budget(12):
+            self.write(shard_size=2, batch_size=2)
+        index = [
+            sitemap.find(f'{NS}loc').text
+            for sitemap in self.parse(sitemaps.INDEX_NAME).getroot()
+        ]
+        self.assertEqual(index, [
+            f'{BASE_URL}/sitemap-posts-1.xml',
+            f'{BASE_URL}/sitemap-posts-2.xml',
+            f'{BASE_URL}/sitemap-posts-3.xml',
+            f'{BASE_URL}/sitemap-groups-1.xml',
+            f'{BASE_URL}/sitemap-profiles-1.xml',
+        ])
+        posts = {}
+        for number in (1, 2, 3):
+            posts.update(self.urls(f'sitemap-posts-{number}.xml'))
+        self.assertEqual(len(posts), len(self.posts))
+        self.assertEqual(
+            posts[f'{BASE_URL}/posts/{self.posts[0].pk}/'],
+            self.comment.created.replace(microsecond=0).isoformat()
+        )
+        self.assertEqual(
+            list(self.urls('sitemap-groups-1.xml')),
+            [f'{BASE_URL}/group/{consts.GROUP_SLUG}/']
+        )
+        self.assertEqual(
+            list(self.urls('sitemap-profiles-1.xml')),
+            [f'{BASE_URL}/profile/{consts.FIRST_USER_USERNAME}/']
+        )
+
+    def test_rewrite_removes_stale_shards(self):
+        self.write(shard_size=2)
+        self.write()
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [
+                'sitemap-groups-1.xml',
+                'sitemap-posts-1.xml',
+                'sitemap-profiles-1.xml',
+                sitemaps.INDEX_NAME,
+            ]
+        )
+
+    def test_served_without_database(self):
+        self.write()
+        with override_settings(SITEMAP_ROOT=self.directory):
+            with self.assertNumQueries(0):
+                response = Client().get('/sitemap-posts-1.xml')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                Client().get('/sitemap-missing.xml').status_code,
+                404
+            )
@@ -0,0 +1,175 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, GroupStats, Post, PostStats, User
+)
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.author = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        cls.new_group = Group.objects.create(
+            title=consts.NEW_GROUP_TITLE,
+            slug=consts.NEW_GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+
+    def author_counts(self, user):
+        return AuthorStats.objects.filter(author=user).values(
+            'posts_count',
+            'comments_count',
+            'followers_count',
+            'following_count'
+        ).get()
+
+    def group_counts(self, group):
+        return GroupStats.objects.filter(group=group).values(
+            'posts_count',
+            'comments_count'
+        ).get()
+
+    def test_counters_follow_writes(self):
+        """Счетчики меняются вместе с постами, комментариями и подписками."""
+        post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text=consts.POST_TEXT
+        )
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': consts.COMMENT_TEXT}
+        )
+        self.authorized_client.get(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertEqual(
+            self.author_counts(self.author),
+            dict(
+                posts_count=1,
+                comments_count=0,
+                followers_count=1,
+                following_count=0
+            )
+        )
+        self.assertEqual(
+            self.author_counts(self.user),
+            dict(
+                posts_count=0,
+                comments_count=1,
+                followers_count=0,
+                following_count=1
+            )
+        )
+        self.assertEqual(
+            self.group_counts(self.group),
+            dict(posts_count=1, comments_count=1)
+        )
+        self.assertEqual(
+            PostStats.objects.get(post=post).comments_count,
+            1
+        )
+        # Пост переезжает в другую группу вместе с комментариями
+        post.group = self.new_group
+        post.save()
+        self.assertEqual(
+            self.group_counts(self.group),
+            dict(posts_count=0, comments_count=0)
+        )
+        self.assertEqual(
+            self.group_counts(self.new_group),
+            dict(posts_count=1, comments_count=1)
+        )
+        post.delete()
+        Follow.objects.all().delete()
+        for user in (self.user, self.author):
+            with self.subTest(user=user):
+                self.assertEqual(
+                    set(self.author_counts(user).values()),
+                    {0}
+                )
+        self.assertEqual(
+            self.group_counts(self.new_group),
+            dict(posts_count=0, comments_count=0)
+        )
+
+    def test_counters_of_one_write_change_together(self):
+        """Если один счетчик не обновился, не меняется ни один."""
+        post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text=consts.POST_TEXT
+        )
+        with mock.patch(
+            'posts.stats.add_to_group',
+            side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            Comment.objects.create(
+                post=post,
+                author=self.user,
+                text=consts.COMMENT_TEXT
+            )
+        self.assertEqual(self.author_counts(self.user)['comments_count'], 0)
+        self.assertEqual(
+            PostStats.objects.get(post=post).comments_count,
+            0
+        )
+
+    def test_profile_and_detail_read_counters(self):
+        """Страницы профиля и поста берут количество постов из счетчика."""
+        post = Post.objects.create(author=self.author, text=consts.POST_TEXT)
+        AuthorStats.objects.filter(author=self.author).update(posts_count=7)
+        response = self.authorized_client.get(
+            reverse(
+                'posts:profile',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertEqual(response.context['posts_count'], 7)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.context['author_posts_count'], 7)
+
+    def test_recount_stats_command(self):
+        """Команда recount_stats чинит разошедшиеся счетчики."""
+        post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text=consts.POST_TEXT
+        )
+        Comment.objects.create(
+            post=post,
+            author=self.user,
+            text=consts.COMMENT_TEXT
+        )
+        AuthorStats.objects.update(posts_count=100, comments_count=100)
+        GroupStats.objects.all().delete()
+        PostStats.objects.update(comments_count=100)
+        call_command('recount_stats', stdout=StringIO())
+        self.assertEqual(self.author_counts(self.author)['posts_count'], 1)
+        self.assertEqual(self.author_counts(self.user)['comments_count'], 1)
+        self.assertEqual(
+            self.group_counts(self.group),
+            dict(posts_count=1, comments_count=1)
+        )
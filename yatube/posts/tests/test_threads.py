@@ -0,0 +1,177 @@
+import re
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts, threads
+from posts.models import Comment, Post, User
+
+
+MORE_REPLIES = re.compile(
+    r'data-comments-url="([^"]+/replies/[^"]*)"'
+)
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.post = Post.objects.create(author=cls.user, text=consts.POST_TEXT)
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text=consts.POST_TEXT
+        )
+        cls.root = cls.reply(None, 'root')
+
+    @classmethod
+    def reply(cls, parent, text):
+        return Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            parent=parent,
+            text=text
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_path_and_subtree(self):
+        """Поддерево ветки - ответы в порядке обхода в глубину."""
+        first = self.reply(self.root, 'first')
+        second = self.reply(self.root, 'second')
+        nested = self.reply(first, 'nested')
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text='other thread'
+        )
+        nested.refresh_from_db()
+        self.assertEqual(
+            nested.path,
+            threads.segment(self.root.pk)
+            + threads.segment(first.pk)
+            + threads.segment(nested.pk)
+        )
+        self.assertEqual(nested.depth, 2)
+        self.assertEqual(
+            list(threads.subtree(self.root)),
+            [first, nested, second]
+        )
+
+    def test_reply_depth_is_limited(self):
+        """Ответ на самый глубокий комментарий уходит его родителю."""
+        parent = self.root
+        for depth in range(threads.MAX_DEPTH):
+            parent = self.reply(parent, f'depth {depth + 1}')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': consts.COMMENT_TEXT, 'parent': parent.pk}
+        )
+        comment = Comment.objects.get(text=consts.COMMENT_TEXT)
+        self.assertEqual(comment.parent_id, parent.parent_id)
+        self.assertEqual(comment.depth, threads.MAX_DEPTH)
+
+    def test_reply_to_other_post_is_ignored(self):
+        self.authorized_client.post(
+            reverse(
+                'posts:add_comment',
+                kwargs={'post_id': self.other_post.pk}
+            ),
+            {'text': consts.COMMENT_TEXT, 'parent': self.root.pk}
+        )
+        comment = Comment.objects.get(text=consts.COMMENT_TEXT)
+        self.assertIsNone(comment.parent_id)
+        self.assertEqual(comment.path, threads.segment(comment.pk))
+
+    def test_model_limits_depth(self):
+        """Глубину ограничивает сама модель, не только форма на сайте."""
+        parent = self.root
+        for depth in range(threads.MAX_DEPTH + 1):
+            parent = self.reply(parent, f'depth {depth + 1}')
+        self.assertEqual(parent.depth, threads.MAX_DEPTH)
+
+    def test_reply_to_other_post_is_invalid(self):
+        comment = Comment(
+            post=self.other_post,
+            author=self.user,
+            parent=self.root,
+            text=consts.COMMENT_TEXT
+        )
+        with self.assertRaises(ValidationError):
+            comment.full_clean()
+
+    def test_admin_does_not_move_saved_comment(self):
+        """В админке у сохраненного комментария пост и родитель - только
+        для чтения: пути поддерева при переносе устарели бы."""
+        model_admin = admin.site._registry[Comment]
+        self.assertEqual(model_admin.get_readonly_fields(None), ())
+        self.assertEqual(
+            set(model_admin.get_readonly_fields(None, self.root)),
+            {'post', 'parent'}
+        )
+
+    def test_thread_pagination(self):
+        """На странице - первые ответы ветки, остальные по ссылке."""
+        replies = [
+            self.reply(self.root, f'reply_number_{number}_')
+            for number in range(threads.REPLIES_PER_THREAD + 2)
+        ]
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        [root] = response.context['post_comments']
+        self.assertEqual(
+            root.thread_replies,
+            replies[:threads.REPLIES_PER_THREAD]
+        )
+        self.assertTrue(root.more_replies)
+        url = MORE_REPLIES.search(response.content.decode()).group(1)
+        fragment = self.authorized_client.get(url.replace('&amp;', '&'))
+        self.assertEqual(
+            list(fragment.context['replies']),
+            replies[threads.REPLIES_PER_THREAD:]
+        )
+        self.assertFalse(fragment.context['more_replies'])
+
+    def test_fill_paths(self):
+        """Комментарии из bulk_create получают пути корней и ответов."""
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='bulk')
+        ])
+        comment = Comment.objects.get(text='bulk')
+        Comment.objects.bulk_create([
+            Comment(
+                post=self.post,
+                author=self.user,
+                parent=comment,
+                text='bulk reply'
+            )
+        ])
+        reply = Comment.objects.get(text='bulk reply')
+        self.assertEqual(reply.path, '')
+        threads.fill_paths()
+        comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual(comment.path, threads.segment(comment.pk))
+        self.assertEqual(reply.path, comment.path + threads.segment(reply.pk))
+        self.assertEqual(reply.depth, 1)
+
+    def test_root_without_path_is_shown_without_replies(self):
+        """Корень без пути (loaddata) не ломает страницу поста."""
+        reply = self.reply(self.root, 'reply')
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='raw root')
+        ])
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        raw_root, root = response.context['post_comments']
+        self.assertEqual(raw_root.thread_replies, [])
+        self.assertEqual(root.thread_replies, [reply])
@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+from PIL import Image
+
+from posts import consts, thumbnails
+from posts.models import Post, ThumbnailJob, User
+
+
+@override_settings(MEDIA_ROOT=consts.TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(consts.TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def upload(self, name=consts.IMAGE_NAME, content=consts.SMALL_GIF):
+        return SimpleUploadedFile(
+            name=name,
+            content=content,
+            content_type='image/gif'
+        )
+
+    def red_gif(self):
+        buffer = BytesIO()
+        Image.new('RGB', (2, 1), 'red').save(buffer, 'GIF')
+        return buffer.getvalue()
+
+    def create_post(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': consts.POST_TEXT, 'image': self.upload()}
+        )
+        return Post.objects.get()
+
+    def test_saving_image_enqueues_thumbnail(self):
+        """Пост с картинкой ставит миниатюру в очередь, а не режет ее."""
+        post = self.create_post()
+        self.assertFalse(post.thumbnail)
+        self.assertTrue(
+            ThumbnailJob.objects.filter(
+                post=post,
+                image=post.image.name
+            ).exists()
+        )
+        # Пока миниатюры нет, лента показывает исходную картинку
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, post.image.url)
+
+        self.assertEqual(thumbnails.run_pending(), 1)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        self.assertTrue(os.path.exists(post.thumbnail.path))
+        self.assertFalse(ThumbnailJob.objects.exists())
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, post.thumbnail.url)
+
+    def test_without_workers_thumbnail_is_rendered_after_commit(self):
+        """Без пула потоков миниатюра режется сразу после коммита."""
+        with mock.patch(
+            'posts.thumbnails.transaction.on_commit',
+            lambda callback: callback()
+        ):
+            post = self.create_post()
+        self.assertTrue(post.thumbnail)
+        self.assertFalse(ThumbnailJob.objects.exists())
+
+    def test_thumbnail_variants_for_srcset(self):
+        """Вместе с миниатюрой нарезаются варианты для srcset."""
+        post = self.create_post()
+        thumbnails.run_pending()
+        post.refresh_from_db()
+        variants = json.loads(post.image_variants)
+        self.assertEqual(
+            [width for mime, width, name in variants if mime == 'image/jpeg'],
+            [*thumbnails.VARIANT_WIDTHS, post.thumbnail.width]
+        )
+        self.assertEqual(
+            {mime for mime, width, name in variants},
+            {
+                'image/jpeg',
+                *(f'image/{image_format.lower()}'
+                  for image_format in thumbnails.variant_formats())
+            }
+        )
+        for mime, width, name in variants:
+            with self.subTest(name=name):
+                self.assertTrue(default_storage.exists(name))
+        response = self.authorized_client.get(reverse('posts:index'))
+        for source in post.image_sources:
+            self.assertContains(response, f'type="{source["type"]}"')
+            self.assertContains(response, f'srcset="{source["srcset"]}"')
+
+    def test_new_image_resets_thumbnail(self):
+        """Замена картинки сбрасывает миниатюру и ставит новое задание."""
+        post = self.create_post()
+        thumbnails.run_pending()
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={
+                'text': consts.POST_TEXT,
+                'image': self.upload('new.gif', self.red_gif())
+            }
+        )
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail)
+        self.assertFalse(post.image_variants)
+        self.assertEqual(
+            list(ThumbnailJob.objects.values_list('image', flat=True)),
+            [post.image.name]
+        )
+
+    def test_pending_collapses_jobs_of_one_image(self):
+        """Повторные задания одной картинки нарезаются один раз."""
+        post = self.create_post()
+        ThumbnailJob.objects.create(post=post, image=post.image.name)
+        self.assertEqual(
+            thumbnails.pending(10),
+            [(post.pk, post.image.name)]
+        )
+
+    def test_missing_image_does_not_block_queue(self):
+        """Задание с пропавшей картинкой не крутится бесконечно."""
+        post = Post.objects.create(
+            author=self.user,
+            text=consts.POST_TEXT,
+            image='posts/missing.gif'
+        )
+        with self.assertLogs('posts.thumbnails', level='ERROR'):
+            thumbnails.run_pending()
+        job = ThumbnailJob.objects.get(post=post)
+        self.assertEqual(job.attempts, thumbnails.MAX_ATTEMPTS)
+        self.assertTrue(job.error)
+
+    def test_warm_thumbnails_command(self):
+        post = self.create_post()
+        call_command('warm_thumbnails', workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        self.assertFalse(ThumbnailJob.objects.exists())
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import consts
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.author = User.objects.create_user(username=consts.USER_USERNAME)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text=consts.POST_TEXT
+        )
+
+    def timeline_posts(self):
+        return list(
+            Post.objects.filter(timeline_entries__user=self.user)
+        )
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Подписка заполняет ленту, отписка ее очищает."""
+        self.authorized_client.get(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertEqual(self.timeline_posts(), [self.old_post])
+        self.authorized_client.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertEqual(self.timeline_posts(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(
+            author=self.author,
+            text=consts.POST_TEXT
+        )
+        entry = TimelineEntry.objects.get(user=self.user, post=new_post)
+        self.assertEqual(entry.created, new_post.created)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [new_post, self.old_post]
+        )
+        # Посты самого пользователя в его ленту не попадают
+        Post.objects.create(author=self.user, text=consts.POST_TEXT)
+        self.assertEqual(self.timeline_posts(), [new_post, self.old_post])
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленты по подпискам."""
+        Follow.objects.create(user=self.user, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline_posts(), [self.old_post])
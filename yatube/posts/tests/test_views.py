@@ -1,10 +1,15 @@
 import shutil
+from unittest import mock
 
 from django import forms
+from django.core.cache import cache, caches
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.testing import LOCAL_CACHES
 from posts import consts
 from posts.models import Follow, Group, Post, User
 
@@ -171,7 +176,7 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post_text_0, consts.POST_TEXT)
         self.assertEqual(post_group_0, consts.NEW_GROUP_TITLE)
         self.assertEqual(post_author_0, consts.USER_USERNAME)
-        self.assertEqual(post_image_0, 'posts/small.gif')
+        self.assertEqual(post_image_0, consts.SMALL_GIF_STORED_NAME)
         self.assertIsInstance(first_object, Post)
 
     def test_first_page_contains_ten_records(self):
@@ -206,8 +211,7 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post_author_0, consts.FIRST_USER_USERNAME)
         self.assertEqual(
             post_image_0,
-            f'posts/small_{consts.NUMBER_OF_POSTS_OF_ONE_GROUP_AND_AUTHOR-1}'
-            '.gif'
+            consts.SMALL_GIF_STORED_NAME
         )
         self.assertIsInstance(first_object, Post)
 
@@ -245,8 +249,7 @@ class PostsPagesTests(TestCase):
         self.assertEqual(post_group_0, consts.GROUP_TITLE)
         self.assertEqual(
             post_image_0,
-            f'posts/small_{consts.NUMBER_OF_POSTS_OF_ONE_GROUP_AND_AUTHOR-1}'
-            '.gif'
+            consts.SMALL_GIF_STORED_NAME
         )
         for post in response.context['page_obj']:
             self.assertEqual(
@@ -304,8 +307,7 @@ class PostsPagesTests(TestCase):
         )
         self.assertEqual(
             choosen_post.image,
-            f'posts/small_{consts.NUMBER_OF_POSTS_OF_ONE_GROUP_AND_AUTHOR-1}'
-            '.gif'
+            consts.SMALL_GIF_STORED_NAME
         )
 
     def test_post_edit_show_correct_context(self):
@@ -440,3 +442,74 @@ class PostsPagesTests(TestCase):
                 f'Не работает отписка от автора {author.username}'
             )
         )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FeedQueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=consts.FIRST_USER_USERNAME
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title=consts.GROUP_TITLE,
+            slug=consts.GROUP_SLUG,
+            description=consts.GROUP_DESCRIPTION
+        )
+        # У каждого поста свой автор и своя группа: при N+1 число
+        # запросов росло бы вместе с размером страницы
+        for i in range(consts.MAX_POSTS_DISPLAYED):
+            author = User.objects.create_user(
+                username=f'{consts.USER_USERNAME}_{i}',
+                first_name=f'Имя {i}',
+                last_name=f'Фамилия {i}'
+            )
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(
+                author=author,
+                group=Group.objects.create(
+                    title=f'{consts.NEW_GROUP_TITLE} {i}',
+                    slug=f'{consts.NEW_GROUP_SLUG}_{i}',
+                    description=consts.GROUP_DESCRIPTION
+                ),
+                text=consts.POST_TEXT
+            )
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=consts.POST_TEXT
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Число запросов ленты не зависит от количества постов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.user.username}
+            ),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            query_counts = set()
+            for page_size in (1, consts.MAX_POSTS_DISPLAYED):
+                cache.clear()
+                # И пользователя сессии: иначе он в кеше только со 2-го раза
+                caches['sessions'].clear()
+                with mock.patch('posts.utils.MAX_POSTS_DISPLAYED', page_size):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.authorized_client.get(url)
+                self.assertEqual(len(response.context['page_obj']), page_size)
+                query_counts.add(len(queries))
+            with self.subTest(url=url):
+                self.assertEqual(
+                    len(query_counts),
+                    1,
+                    f'Число запросов к {url} растет с размером страницы'
+                )
@@ -0,0 +1,150 @@
+"""Ветки ответов на комментарии.
+
+Путь комментария (Comment.path) - id его предков и его собственный,
+каждый дополнен нулями до PATH_SEGMENT цифр. Сортировка по path дает
+ветку в порядке обхода в глубину, а все поддерево комментария - это
+диапазон path внутри поста: path > path корня и path < path корня +
+'~', то есть один проход по индексу (post, path) без рекурсии.
+
+Ответы глубже MAX_DEPTH не заводятся: ответ на самый глубокий
+комментарий становится ответом его родителю. На странице поста у
+каждой ветки видно не больше REPLIES_PER_THREAD ответов, остальные
+догружаются страницами по тому же диапазону.
+"""
+from django.db import connections, router
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+from .models import Comment
+
+
+PATH_SEGMENT = 10
+# Любая цифра пути меньше этого символа
+PATH_END = '~'
+MAX_DEPTH = 3
+REPLIES_PER_THREAD = 3
+REPLIES_PAGE = 20
+
+
+def segment(pk):
+    return str(pk).zfill(PATH_SEGMENT)
+
+
+def reply_parent(parent):
+    """Кому на самом деле отвечаем с учетом MAX_DEPTH."""
+    if parent is not None and parent.depth >= MAX_DEPTH:
+        return parent.parent
+    return parent
+
+
+def place(comment):
+    """Записывает путь и глубину только что созданного комментария."""
+    if comment.parent_id is None:
+        comment.path = segment(comment.pk)
+        comment.depth = 0
+    else:
+        comment.path = comment.parent.path + segment(comment.pk)
+        comment.depth = comment.parent.depth + 1
+    Comment.objects.filter(pk=comment.pk).update(
+        path=comment.path,
+        depth=comment.depth
+    )
+
+
+def _own_segment():
+    return LPad(Cast('pk', CharField()), PATH_SEGMENT, Value('0'))
+
+
+def fill_paths():
+    """Пути и глубины комментариев, вставленных bulk_create.
+
+    Корни заполняются одним UPDATE, ответы - по UPDATE на уровень
+    ветки: путь родителя плюс свой id.
+    """
+    filled = Comment.objects.filter(path='', parent=None).update(
+        path=_own_segment(),
+        depth=0
+    )
+    parents = Comment.objects.filter(pk=OuterRef('parent_id'))
+    while True:
+        level = Comment.objects.filter(path='', parent__path__gt='').update(
+            path=Concat(
+                Subquery(parents.values('path')[:1]),
+                _own_segment(),
+                output_field=CharField()
+            ),
+            depth=Subquery(parents.values('depth')[:1]) + 1
+        )
+        if not level:
+            return filled
+        filled += level
+
+
+def subtree(comment):
+    """Ответы ветки comment по порядку обхода, одним диапазоном."""
+    return Comment.objects.filter(
+        post_id=comment.post_id,
+        path__gt=comment.path,
+        path__lt=comment.path + PATH_END
+    ).order_by('path')
+
+
+def replies_page(root, after=None, limit=REPLIES_PAGE):
+    """Следующие limit ответов ветки после пути after.
+
+    Возвращает (ответы, есть ли еще).
+    """
+    replies = subtree(root).select_related('author')
+    if after:
+        replies = replies.filter(path__gt=after)
+    replies = list(replies[:limit + 1])
+    return replies[:limit], len(replies) > limit
+
+
+def attach_replies(roots, limit=REPLIES_PER_THREAD):
+    """Кладет в root.thread_replies первые limit ответов каждой ветки.
+
+    Первые ответы всех веток выбираются одним запросом - UNION ALL
+    диапазонов индекса (post, path) с LIMIT на каждую ветку, поэтому
+    длинная ветка не читается целиком. Сами комментарии с авторами -
+    вторым запросом к той же базе (на странице поста это реплика).
+    root.more_replies говорит, есть ли в ветке ответы сверх показанных.
+
+    Корни без пути (загружены loaddata мимо сигналов) показываются без
+    ответов: их диапазон захватил бы все комментарии поста.
+    """
+    for root in roots:
+        root.thread_replies = []
+        root.more_replies = False
+    roots = [root for root in roots if root.path]
+    if not roots:
+        return
+    thread = (
+        f'SELECT * FROM (SELECT id, path FROM {Comment._meta.db_table} '
+        f'WHERE post_id = %s AND path > %s AND path < %s '
+        f'ORDER BY path LIMIT %s)'
+    )
+    params = []
+    for root in roots:
+        params += [root.post_id, root.path, root.path + PATH_END, limit + 1]
+    using = router.db_for_read(Comment) or 'default'
+    with connections[using].cursor() as cursor:
+        cursor.execute(' UNION ALL '.join([thread] * len(roots)), params)
+        rows = cursor.fetchall()
+    by_thread = {root.path: root for root in roots}
+    shown = []
+    for pk, path in sorted(rows, key=lambda row: row[1]):
+        root = by_thread[path[:PATH_SEGMENT]]
+        if len(root.thread_replies) < limit:
+            root.thread_replies.append(pk)
+            shown.append(pk)
+        else:
+            # limit + 1-й ответ только говорит, что ветка длиннее
+            root.more_replies = True
+    replies = Comment.objects.using(using).select_related(
+        'author'
+    ).in_bulk(shown)
+    for root in roots:
+        root.thread_replies = [
+            replies[pk] for pk in root.thread_replies if pk in replies
+        ]
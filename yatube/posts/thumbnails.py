@@ -0,0 +1,230 @@
+"""Фоновая нарезка миниатюр картинок постов.
+
+Сохранение поста с новой картинкой ставит задание в очередь
+(таблица ThumbnailJob). Если задан THUMBNAIL_WORKERS, очередь после
+коммита транзакции разбирает пул потоков самого веб-процесса, а
+задания, оставшиеся с прошлого запуска, - после первого запроса
+процесса. Без пула миниатюра режется сразу после коммита в том же
+запросе, а неудавшиеся и старые задания дорезает
+`manage.py warm_thumbnails --watch`. Шаблоны выводят готовый
+Post.thumbnail и не трогают картинку во время показа.
+
+Вместе с миниатюрой нарезаются варианты поуже и в более легких
+форматах (Post.image_variants) для <picture>/srcset: телефон скачивает
+картинку под свой экран, а не десктопную.
+"""
+import json
+import logging
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import delete, get_thumbnail
+
+from . import feed_cache
+from .models import Post, ThumbnailJob
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = dict(crop='center', upscale=True)
+# Ширины вариантов для srcset, самый широкий вариант - сама миниатюра
+VARIANT_WIDTHS = (320, 480, 768)
+# Форматы легче исходного, которые отдаются браузерам, если их
+# умеет кодировать установленный Pillow. AVIF sorl пока не поддерживает
+VARIANT_FORMATS = ('WEBP',)
+# После стольких неудач задание больше не берется в работу
+MAX_ATTEMPTS = 3
+# Задание, взятое раньше, считается брошенным упавшим воркером
+JOB_TIMEOUT = timedelta(minutes=10)
+
+_executor = None
+_executor_lock = threading.Lock()
+_drained = False
+
+
+def geometry(width):
+    """Геометрия варианта с пропорциями миниатюры."""
+    base_width, base_height = map(int, THUMBNAIL_GEOMETRY.split('x'))
+    return f'{width}x{round(base_height * width / base_width)}'
+
+
+def variant_formats():
+    """Форматы из VARIANT_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [name for name in VARIANT_FORMATS if name in Image.SAVE]
+
+
+def _thumbnail(image, geometry_string, **options):
+    thumbnail = get_thumbnail(
+        image,
+        geometry_string,
+        **THUMBNAIL_OPTIONS,
+        **options
+    )
+    # sorl не бросает исключение, если не смог прочитать картинку
+    if not thumbnail.exists():
+        raise ValueError(f'Миниатюра {thumbnail.name} не создана')
+    return thumbnail
+
+
+def _variant(thumbnail, width):
+    return [mimetypes.guess_type(thumbnail.name)[0], width, thumbnail.name]
+
+
+def render(image, force=False):
+    """Нарезает миниатюру и ее варианты.
+
+    Возвращает имя миниатюры в хранилище и JSON со списком вариантов
+    [[mime, ширина, имя], ...]: сначала легкие форматы, затем формат
+    самой миниатюры.
+    """
+    if force:
+        delete(image, delete_file=False)
+    thumbnail = _thumbnail(image, THUMBNAIL_GEOMETRY)
+    widths = (*VARIANT_WIDTHS, thumbnail.width)
+    variants = []
+    for image_format in variant_formats():
+        for width in widths:
+            variants.append(_variant(
+                _thumbnail(image, geometry(width), format=image_format),
+                width
+            ))
+    for width in VARIANT_WIDTHS:
+        variants.append(_variant(_thumbnail(image, geometry(width)), width))
+    variants.append(_variant(thumbnail, thumbnail.width))
+    return thumbnail.name, json.dumps(variants)
+
+
+def render_batch(rows, force=False):
+    """Нарезает миниатюры для [(pk, image_name), ...].
+
+    Возвращает [(pk, image_name, миниатюра, варианты), ...], при ошибке
+    вместо миниатюры и вариантов None.
+
+    Выполняется и в отдельных процессах (warm_thumbnails), поэтому
+    получает и возвращает только простые значения.
+    """
+    field = Post._meta.get_field('image')
+    results = []
+    for pk, name in rows:
+        image = field.attr_class(None, field, name)
+        try:
+            if not image.storage.exists(name):
+                raise FileNotFoundError(name)
+            results.append((pk, name, *render(image, force)))
+        except Exception:
+            logger.exception('Не удалось нарезать миниатюру %s', name)
+            results.append((pk, name, None, None))
+    return results
+
+
+def store(results):
+    """Записывает готовые миниатюры в посты и закрывает их задания."""
+    for pk, name, thumbnail, variants in results:
+        if thumbnail is None:
+            ThumbnailJob.objects.filter(post_id=pk, image=name).update(
+                started=None,
+                attempts=F('attempts') + 1,
+                error=f'Не удалось нарезать миниатюру {name}'
+            )
+            continue
+        # Картинку могли заменить, пока резалась миниатюра. Та же
+        # картинка у других постов (posts.images) получает ту же миниатюру
+        posts = Post.objects.filter(image=name)
+        posts.update(thumbnail=thumbnail, image_variants=variants)
+        ThumbnailJob.objects.filter(image=name).delete()
+        for post in posts.only('author', 'group'):
+            feed_cache.bump_post(post)
+
+
+def pending(limit):
+    """[(pk, image_name), ...] из очереди для пакетной нарезки."""
+    # Сортировка по created добавила бы его в SELECT DISTINCT, и
+    # задания одной картинки не схлопнулись бы
+    jobs = ThumbnailJob.objects.filter(
+        attempts__lt=MAX_ATTEMPTS
+    ).order_by('post_id')
+    return list(jobs.values_list('post_id', 'image').distinct()[:limit])
+
+
+def enqueue(post):
+    """Ставит картинку поста в очередь на нарезку миниатюры."""
+    ThumbnailJob.objects.create(post=post, image=post.image.name)
+    if getattr(settings, 'THUMBNAIL_WORKERS', 0):
+        transaction.on_commit(_kick)
+    else:
+        # Только эта картинка: очередь целиком запрос не разбирает
+        row = (post.pk, post.image.name)
+        transaction.on_commit(lambda: store(render_batch([row])))
+
+
+def drain_on_first_request(**kwargs):
+    """Обработчик request_started: разбирает старые задания очереди."""
+    global _drained
+    if _drained or not getattr(settings, 'THUMBNAIL_WORKERS', 0):
+        return
+    _drained = True
+    transaction.on_commit(_kick)
+
+
+def _kick():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+    _executor.submit(_run_in_thread)
+
+
+def _run_in_thread():
+    try:
+        run_pending()
+    except Exception:
+        logger.exception('Очередь миниатюр остановилась с ошибкой')
+    finally:
+        connection.close()
+
+
+def _claim():
+    """Забирает одно задание так, чтобы его не взял другой поток."""
+    now = timezone.now()
+    available = ThumbnailJob.objects.filter(
+        Q(started__isnull=True) | Q(started__lt=now - JOB_TIMEOUT),
+        attempts__lt=MAX_ATTEMPTS
+    )
+    for job in available[:1]:
+        claimed = ThumbnailJob.objects.filter(
+            pk=job.pk,
+            started=job.started
+        ).update(started=now)
+        if claimed:
+            return job
+    return None
+
+
+def run_pending():
+    """Разбирает очередь, пока в ней есть задания. Возвращает их число."""
+    processed = 0
+    while True:
+        job = _claim()
+        if job is None:
+            return processed
+        processed += 1
+        current = Post.objects.filter(
+            pk=job.post_id
+        ).values_list('image', flat=True).first()
+        if current != job.image:
+            # Устаревшее задание: у поста уже другая картинка
+            job.delete()
+            continue
+        store(render_batch([(job.post_id, job.image)]))
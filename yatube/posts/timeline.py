@@ -0,0 +1,76 @@
+from django.db import connection, transaction
+
+from .models import Follow, Post, TimelineEntry
+
+
+# Сколько записей ленты вставлять за один запрос
+TIMELINE_BATCH_SIZE = 500
+
+
+def fan_out_post(post):
+    """Раздает новый пост в ленты всех подписчиков автора."""
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in follower_ids.iterator()
+        ),
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика уже написанные посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'created')
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, created=created)
+            for pk, created in posts.iterator()
+        ),
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Собирает ленты заново по текущим подпискам.
+
+    Возвращает количество пересобранных лент.
+    """
+    follows = Follow.objects.order_by()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+    follows_sql, params = follows.values(
+        'user_id', 'author_id'
+    ).query.sql_with_params()
+    with transaction.atomic():
+        entries = TimelineEntry.objects.all()
+        if user_ids is not None:
+            entries = entries.filter(user_id__in=user_ids)
+        entries.delete()
+        # Одним INSERT ... SELECT: после массовой загрузки записей лент
+        # миллионы, и гонять их через Python слишком долго
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {TimelineEntry._meta.db_table} '
+                f'(user_id, post_id, created) '
+                f'SELECT follow.user_id, post.id, post.created '
+                f'FROM ({follows_sql}) AS follow '
+                f'JOIN {Post._meta.db_table} AS post '
+                f'ON post.author_id = follow.author_id',
+                params
+            )
+    return follows.values('user_id').distinct().count()
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 
 app_name = 'posts'
@@ -12,6 +12,37 @@ urlpatterns = [
         views.index,
         name='index'
     ),
+    # Ленты RSS и Atom
+    path(
+        'rss/',
+        feeds.index_rss,
+        name='index_rss'
+    ),
+    path(
+        'atom/',
+        feeds.index_atom,
+        name='index_atom'
+    ),
+    path(
+        'group/<slug:slug>/rss/',
+        feeds.group_rss,
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.group_atom,
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.profile_rss,
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.profile_atom,
+        name='profile_atom'
+    ),
     # Страницы сообществ.
     path(
         'group/<slug:slug>/',
@@ -30,6 +61,12 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    # Поиск по постам
+    path(
+        'search/',
+        views.search,
+        name='search'
+    ),
     # Создание поста
     path(
         'create/',
@@ -42,6 +79,18 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    # Следующая страница комментариев поста
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    # Следующие ответы ветки комментария
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/replies/',
+        views.comment_replies,
+        name='comment_replies'
+    ),
     # комментирование поста
     path(
         'posts/<int:post_id>/comment/',
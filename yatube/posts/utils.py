@@ -1,9 +1,126 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 from .consts import MAX_POSTS_DISPLAYED
 
+# Больше id не влезет в INTEGER SQLite: запрос упадет с OverflowError
+MAX_ID = 2 ** 63 - 1
+
+
+def model_key(obj):
+    return obj.created, obj.pk
+
+
+def encode_cursor(obj, key=model_key):
+    """Упаковывает ключ (created, id) записи в непрозрачный токен."""
+    created, pk = key(obj)
+    raw = f'{created.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен в (created, id), для мусора возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created, pk = raw.decode().split('|')
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    # Поддельный токен: наивная дата или id вне INTEGER базы
+    if created is None or created.tzinfo is None or not 0 < pk <= MAX_ID:
+        return None
+    return created, pk
+
+
+class CursorPage(Page):
+    """Страница курсорного паджинатора.
+
+    Ни номера страницы, ни общего количества записей здесь нет:
+    навигация идет только вперед и назад по токенам.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """Паджинация по ключу (created, id) без COUNT(*) и OFFSET.
+
+    Каждая страница - это один запрос по диапазону ключа, поэтому
+    время ответа не зависит от глубины страницы.
+    """
+
+    def __init__(self, object_list, per_page, key=model_key):
+        self.object_list = object_list
+        self.per_page = per_page
+        # Как достать (created, id) из строки: у values_list это не атрибуты
+        self.key = key
+
+    def get_page(self, after=None, before=None):
+        after = decode_cursor(after)
+        before = None if after else decode_cursor(before)
+        queryset = self.object_list
+        if after:
+            created, pk = after
+            queryset = queryset.filter(
+                Q(created__lt=created) | Q(created=created, pk__lt=pk)
+            ).order_by('-created', '-pk')
+        elif before:
+            created, pk = before
+            queryset = queryset.filter(
+                Q(created__gt=created) | Q(created=created, pk__gt=pk)
+            ).order_by('created', 'pk')
+        else:
+            queryset = queryset.order_by('-created', '-pk')
+        # Берем на одну запись больше, чтобы узнать, есть ли продолжение
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            rows.reverse()
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or before:
+                next_cursor = encode_cursor(rows[-1], self.key)
+            if after or (before and has_more):
+                previous_cursor = encode_cursor(rows[0], self.key)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+def paginator_ops_func(objects_list, request, count=None):
+    """Страница ленты по ?page= (или по ?after=/?before= в курсорном режиме).
 
-def paginator_ops_func(objects_list, request):
+    Если общее число записей уже известно (count), Paginator
+    не выполняет свой COUNT(*).
+    """
+    if getattr(settings, 'POSTS_CURSOR_PAGINATION', False):
+        paginator = CursorPaginator(objects_list, MAX_POSTS_DISPLAYED)
+        return paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
     paginator = Paginator(objects_list, MAX_POSTS_DISPLAYED)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
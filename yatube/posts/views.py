@@ -1,34 +1,59 @@
+from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 
-from .models import Post, Group, Follow, User
+from . import feed_cache, stats, threads
+from .conditional import (
+    group_condition, index_condition, post_condition, profile_condition
+)
+from .consts import MAX_COMMENTS_DISPLAYED, MAX_POSTS_DISPLAYED
+from .models import Comment, Post, Group, Follow, User
 from .forms import CommentForm, PostForm
-from .utils import paginator_ops_func
+from .search import SearchResults
+from .utils import CursorPaginator, decode_cursor, paginator_ops_func
 
 
 # Выводит информацию на главной странице
+@index_condition
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.for_feed()
     page_obj = paginator_ops_func(posts, request)
-    context = dict(page_obj=page_obj)
+    context = dict(
+        page_obj=page_obj,
+        cache_key=feed_cache.page_key(request, page_obj, feed_cache.INDEX)
+    )
     template = 'posts/index.html'
     return render(request, template, context)
 
 
 # Показывает статьи в группе
+@group_condition
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.group_name.all()
-    page_obj = paginator_ops_func(post_list, request)
-    context = dict(page_obj=page_obj, group=group)
+    post_list = group.group_name.for_feed()
+    page_obj = paginator_ops_func(
+        post_list,
+        request,
+        count=stats.group_stats(group.pk).posts_count
+    )
+    context = dict(
+        page_obj=page_obj,
+        group=group,
+        cache_key=feed_cache.page_key(
+            request, page_obj, feed_cache.group_feed(group.pk)
+        )
+    )
     template = 'posts/group_list.html'
     return render(request, template, context)
 
 
+@profile_condition
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    posts_count = post_list.count()
+    post_list = author.posts.for_feed()
+    posts_count = stats.author_stats(author.pk).posts_count
     # Проверяем подписан ли пользователь на автора
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
@@ -36,31 +61,118 @@ def profile(request, username):
     ).exists()
     # Проверяем если пользователь и есть автор
     user_is_author = request.user.is_authenticated and request.user == author
-    page_obj = paginator_ops_func(post_list, request)
+    page_obj = paginator_ops_func(post_list, request, count=posts_count)
     context = dict(
         page_obj=page_obj,
         author=author,
         posts_count=posts_count,
         following=following,
-        user_is_author=user_is_author
+        user_is_author=user_is_author,
+        cache_key=feed_cache.page_key(
+            request, page_obj, feed_cache.author_feed(author.pk)
+        )
     )
     return render(request, 'posts/profile.html', context)
 
 
+# Полнотекстовый поиск по постам, самые релевантные первыми
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(
+        SearchResults(query),
+        MAX_POSTS_DISPLAYED
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = dict(
+        page_obj=page_obj,
+        query=query,
+        # Ссылки паджинатора не должны терять запрос
+        page_query=urlencode(dict(q=query)) + '&'
+    )
+    return render(request, 'posts/search.html', context)
+
+
+def _comments_page(post, after):
+    """Страница веток комментариев после курсора, новые первыми.
+
+    У каждого корня ветки в thread_replies - первые ответы ветки.
+    """
+    paginator = CursorPaginator(
+        post.comments.filter(parent=None).select_related('author'),
+        MAX_COMMENTS_DISPLAYED
+    )
+    page = paginator.get_page(after=after)
+    threads.attach_replies(page.object_list)
+    return page
+
+
+@post_condition
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    author_posts_count = post.author.posts.all().count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group', 'stats'),
+        pk=post_id
+    )
+    author_posts_count = stats.author_stats(post.author_id).posts_count
     form = CommentForm()
-    post_comments = post.comments.all()
+    after = request.GET.get('after')
+    # В ключ фрагмента - разобранный курсор: мусорные ?after= не
+    # заводят новых записей в кеше
+    cursor = decode_cursor(after)
+    # Комментарии подписаны именами авторов
+    versions = feed_cache.get_versions(
+        feed_cache.NAMES,
+        feed_cache.post_feed(post.pk)
+    )
     context = dict(
         post=post,
         author_posts_count=author_posts_count,
         form=form,
-        post_comments=post_comments
+        # Запрос комментариев - только если фрагмента нет в кеше
+        post_comments=SimpleLazyObject(
+            lambda: _comments_page(post, after)
+        ),
+        comments_count=stats.post_stats(post).comments_count,
+        reply_to=request.GET.get('reply_to', ''),
+        # Ссылки "Ответить" видны только вошедшим
+        cache_key=(
+            f'{versions}:{"|".join(map(str, cursor or ()))}:'
+            f'{request.user.is_authenticated}'
+        )
     )
     return render(request, 'posts/post_detail.html', context)
 
 
+# Следующие комментарии для кнопки "Показать еще", фрагментом HTML
+@post_condition
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = dict(
+        post=post,
+        post_comments=_comments_page(post, request.GET.get('after'))
+    )
+    return render(request, 'posts/includes/comments_list.html', context)
+
+
+# Следующие ответы ветки комментария, фрагментом HTML
+@post_condition
+def comment_replies(request, post_id, comment_id):
+    root = get_object_or_404(
+        Comment.objects.only('pk', 'post_id', 'path'),
+        pk=comment_id,
+        post_id=post_id
+    )
+    replies, more_replies = threads.replies_page(
+        root,
+        request.GET.get('after')
+    )
+    context = dict(
+        root=root,
+        replies=replies,
+        more_replies=more_replies
+    )
+    return render(request, 'posts/includes/replies_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -102,6 +214,15 @@ def post_edit(request, post_id):
     return redirect('posts:post_detail', post_id=post.id)
 
 
+def _reply_to(post, parent_id):
+    """Комментарий поста, на который отвечают (с учетом глубины)."""
+    if not str(parent_id or '').isdigit():
+        return None
+    return threads.reply_parent(
+        post.comments.select_related('parent').filter(pk=parent_id).first()
+    )
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -112,6 +233,7 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = _reply_to(post, request.POST.get('parent'))
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
@@ -119,11 +241,12 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):  # Криво, зато сам! Могу переделать.
     '''Страница постов авторов, на которых подписан пользователь'''
-    # Выбираем все посты авторов на которых подписан пользователь
-    post_list = Post.objects.filter(
-        author__following__user=request.user
-    )
-    page_obj = paginator_ops_func(post_list, request)
+    # Посты авторов, на которых подписан пользователь, заранее разложены
+    # по его ленте (TimelineEntry) - читаем один диапазон индекса
+    # (user, -created), а пагинация идет по ключу самих записей ленты
+    entries = request.user.timeline.for_feed()
+    page_obj = paginator_ops_func(entries, request)
+    page_obj.object_list = [entry.post for entry in page_obj]
     context = dict(
         page_obj=page_obj
     )
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -43,6 +44,7 @@ INTERNAL_IPS = [
 # Application definition
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'debug_toolbar',
     'django.contrib.admin',
@@ -57,11 +59,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы время ответа включало остальные middleware
+    'core.metrics.MetricsMiddleware',
+    # Сжимает HTML лент; токен CSRF маскируется в каждом ответе,
+    # поэтому BREACH его не вытянет
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.replicas.ReplicaMiddleware',
+    'core.querylog.QueryLogMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -100,6 +109,78 @@ DATABASES = {
     }
 }
 
+# Гистограммы времени ответа, запросов к базе, рендера и размера
+# ответа по представлениям (core.metrics), отдаются на /metrics.
+# False убирает middleware из цепочки
+METRICS_ENABLED = True
+# С каких адресов Prometheus может читать /metrics
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+# Журнал медленных запросов и статистика по отпечаткам SQL
+# (core.querylog), смотреть: python manage.py top_queries
+QUERY_LOG_ENABLED = False
+# Запросы дольше этого порога пишутся в slow_queries.log
+QUERY_LOG_SLOW_MS = 100
+QUERY_LOG_DIR = os.path.join(BASE_DIR, 'logs')
+
+# Реплики только для чтения (core.replicas). Локально это копии
+# db.sqlite3, их обновляет python manage.py sync_replicas:
+# YATUBE_SQLITE_REPLICAS=/tmp/replica1.sqlite3,/tmp/replica2.sqlite3
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_SQLITE_REPLICAS', '').split(',')),
+    start=1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'PRAGMAS': {'query_only': 1},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# GET-запросы к этим представлениям читают с реплик
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:post_comments',
+    'posts:comment_replies',
+    'posts:follow_index',
+    'posts:index_rss',
+    'posts:index_atom',
+    'posts:group_rss',
+    'posts:group_atom',
+    'posts:profile_rss',
+    'posts:profile_atom',
+    'api:v1:posts',
+    'api:v1:group_posts',
+    'api:v1:post_comments',
+    'api:v1:follow',
+)
+# Сколько секунд после записи пользователь читает только с default
+REPLICA_PIN_SECONDS = 5
+# Где sync_replicas оставляет время снимков реплик для кеша лент
+REPLICA_CACHE_ALIAS = 'feed_versions'
+
+# PRAGMA для каждого соединения с SQLite (core.sqlite). WAL пускает
+# читателей лент параллельно с записью постов и комментариев, а
+# busy_timeout заставляет писателя подождать, а не падать с
+# "database is locked". Отдельной базе профиль можно дополнить
+# ключом DATABASES[alias]['PRAGMAS']
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': 5000,
+    # В WAL NORMAL не теряет целостность, fsync только на checkpoint
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер кэша страниц в КиБ
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -148,6 +229,12 @@ STATIC_ROOT = (
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Карта сайта: файлы пишет команда write_sitemaps, отдает их веб-сервер
+# (или core.views.sitemap) без запросов к базе
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+# Адрес сайта для абсолютных ссылок карты
+SITE_URL = 'https://neblog.onthewifi.com'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 '''LOGOUT_REDIRECT_URL = 'users:logout' '''
@@ -162,5 +249,57 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Сессии и пользователи запросов: файлы видны всем воркерам
+    # машины, Redis не нужен. Каталог считается раз в CULL_EVERY
+    # записей, а не на каждой (core.cache)
+    'sessions': {
+        'BACKEND': 'core.cache.FileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'sessions'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_EVERY': 1000,
+        },
+    },
+    # Версии лент (posts.feed_cache): их сбрасывают и другие воркеры,
+    # и команды вроде warm_thumbnails и import_posts
+    'feed_versions': {
+        'BACKEND': 'core.cache.FileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'feed_versions'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_EVERY': 1000,
+        },
+    },
 }
+FEED_VERSION_CACHE_ALIAS = 'feed_versions'
+
+# Сессия читается из кеша, а пишется и в кеш, и в базу: после
+# очистки кеша никого не разлогинит
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователь сессии тоже берется из кеша (core.auth), запись
+# сбрасывается при сохранении пользователя. ModelBackend остается,
+# чтобы действовали сессии, открытые до появления кеша
+AUTHENTICATION_BACKENDS = (
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+)
+USER_CACHE_ALIAS = 'sessions'
+# Дольше этого живут изменения пользователя в обход save() и delete()
+# (QuerySet.update): сигналы о них не приходят
+USER_CACHE_SECONDS = 5 * 60
+
+# Курсорная паджинация лент (?after=<токен>) вместо номеров страниц:
+# без COUNT(*) и OFFSET, время ответа не зависит от глубины страницы
+POSTS_CURSOR_PAGINATION = False
+
+# Потоки веб-процесса, нарезающие миниатюры картинок постов
+# (posts.thumbnails): запрос, сохранивший пост, картинку не режет.
+# 0 - миниатюра режется сразу после коммита в том же запросе, а
+# неудавшиеся задания и картинки старых постов дорезает отдельный
+# процесс python manage.py warm_thumbnails --watch 5. Под тестами
+# пула нет: его потоки делили бы с тестом базу в памяти
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+THUMBNAIL_WORKERS = 0 if TESTING else 2
@@ -16,7 +16,9 @@ Including another URLconf
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core import views as core_views
 
 
 handler404 = 'core.views.page_not_found'
@@ -45,6 +47,21 @@ urlpatterns = [
         'about/',
         include('about.urls', namespace='about')
     ),
+    path(
+        'api/',
+        include('api.urls', namespace='api')
+    ),
+    # Карта сайта из файлов write_sitemaps
+    re_path(
+        r'^(?P<path>sitemap[\w-]*\.xml)$',
+        core_views.sitemap,
+        name='sitemap'
+    ),
+    path(
+        'metrics',
+        core_views.metrics,
+        name='metrics'
+    ),
 ]
 
 if settings.DEBUG: